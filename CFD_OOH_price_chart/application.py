@@ -50,12 +50,15 @@ class Application(QtWidgets.QApplication):
                  exchange_dataclass_container: Dict[str, ExchangeInfo],
                  ) -> None:
         self.instrument_container=instrument_container
+        # ticks arrive keyed by instrument id, the position in instrument_container (utils_streaming.create_instrument_ids)
+        self.instruments_by_id=list(instrument_container.values())
         self.timeseries_parent_container=timeseries_parent_container
         self.exchange_dataclass_container=exchange_dataclass_container
         
     def add_streaming_apps(self, websocket_worker: WebsocketWorker, streaming_client) -> None:
         self._websocket_worker=websocket_worker
         self._websocket_worker.update_signal.connect(self._websocket_response)
+        self._websocket_worker.batch_signal.connect(self._websocket_batch_response)
         self._streaming_client=streaming_client
     
     def start(self):       
@@ -63,10 +66,29 @@ class Application(QtWidgets.QApplication):
         self.open_window(self.subplot_widget_container)        
         self.aboutToQuit.connect(self._cleanup)
         
-    @QtCore.Slot(str, float, float, float)
-    def _websocket_response(cls, name, timestamp, bid, ask):
-        instrument_object = cls.instrument_container[name]
+    @QtCore.Slot(int, float, float, float)
+    def _websocket_response(cls, instrument_id, timestamp, bid, ask):
+        instrument_object = cls.instruments_by_id[instrument_id]
         instrument_object.update(timestamp=timestamp, bid=bid, ask=ask)
+
+    @QtCore.Slot(object)
+    def _websocket_batch_response(cls, batch):
+        """
+        Per-tick callbacks (synthetic instruments, ig_measuring leaders/followers) are
+        replayed in arrival order across instruments, so that e.g. a follower sees the
+        leader ticks that arrived before it; batch callbacks then get each instrument's
+        ticks in one call.
+        """
+        groups, ticks = batch
+        instruments_by_id = cls.instruments_by_id
+        tick_callbacks = {instrument_id : instruments_by_id[instrument_id].get_tick_callbacks() for instrument_id in groups}
+        if any(tick_callbacks.values()):
+            for instrument_id, timestamp, bid, ask in zip(*ticks):
+                callbacks = tick_callbacks[instrument_id]
+                if callbacks:
+                    instruments_by_id[instrument_id].update_tick(timestamp, bid, ask, callbacks)
+        for instrument_id, (timestamps, bids, asks) in groups.items():
+            instruments_by_id[instrument_id].update_batch(timestamps, bids, asks, replay_ticks=False)
         
     def open_window(self, subplot_widget_container: Dict[str, SubplotWidget]):
         self.n_windows+=1
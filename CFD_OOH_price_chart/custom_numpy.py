@@ -75,7 +75,100 @@ class BufferArray(np.ndarray):
     def max(self, axis=None, out=None, **kwargs):
         valid_data = self[:self.n].view(np.ndarray)
         return valid_data.max(axis=axis, out=out, **kwargs)
-   
+
+
+class GrowableArray:
+    """
+    Contiguous 1-D buffer with amortised O(1) appends.
+
+    Unlike BufferArray, growing allocates a new buffer and copies into it instead of
+    resizing in place, so views handed out by get_array() before a grow stay valid
+    (they keep pointing at the old buffer and simply stop seeing new values).
+    """
+    __slots__ = ("_data", "n")
+    GROWTH = 2
+
+    def __init__(self, input_array=None, dtype=np.float64, capacity: int | None=None):
+        base = np.empty(0, dtype=dtype) if input_array is None else np.asarray(input_array, dtype=dtype)
+        self.n = base.size
+        cap = max(1, self.GROWTH * self.n, capacity or 0)
+        self._data = np.empty(cap, dtype=dtype)
+        self._data[:self.n] = base
+
+    def __len__(self):
+        return self.n
+
+    @property
+    def dtype(self):
+        return self._data.dtype
+
+    def _reserve(self, n_required: int):
+        if n_required <= self._data.size:
+            return
+        cap = self._data.size
+        while cap < n_required:
+            cap *= self.GROWTH
+        data = np.empty(cap, dtype=self._data.dtype)
+        data[:self.n] = self._data[:self.n]
+        self._data = data
+
+    def append(self, value):
+        if self.n >= self._data.size:
+            self._reserve(self.n + 1)
+        self._data[self.n] = value
+        self.n += 1
+
+    def extend(self, values):
+        values = np.asarray(values, dtype=self._data.dtype)
+        self._reserve(self.n + values.size)
+        self._data[self.n:self.n + values.size] = values
+        self.n += values.size
+
+    def replace_tail(self, idx_start: int, values):
+        """Overwrites everything from idx_start onwards with values (in place)."""
+        values = np.asarray(values, dtype=self._data.dtype)
+        self._reserve(idx_start + values.size)
+        self._data[idx_start:idx_start + values.size] = values
+        self.n = idx_start + values.size
+
+    def get_array(self):
+        return self._data[:self.n]
+
+    def get_array_at(self, lb, ub):
+        return self.get_array()[lb:ub]
+
+    def get_last_value(self):
+        if self.n > 0:
+            return self._data[self.n-1]
+        return np.nan
+
+    def drop_first(self, n_drop: int):
+        n_drop = min(n_drop, self.n)
+        data = np.empty(self._data.size, dtype=self._data.dtype)
+        data[:self.n - n_drop] = self._data[n_drop:self.n]
+        self._data = data
+        self.n -= n_drop
+
+
+def merge_sorted_union(arrays: List[np.ndarray]) -> Tuple[np.ndarray, List[np.ndarray]]:
+    """
+    Union of already-sorted 1-D arrays together with, for every input, the index of
+    each of its elements in the union (what np.searchsorted(union, array) would give).
+    The concatenation is a sequence of sorted runs, which the stable sort merges
+    rather than re-sorting.
+    """
+    sizes = [array.size for array in arrays]
+    merged = np.concatenate(arrays) if arrays else np.empty(0)
+    order = np.argsort(merged, kind="stable")
+    merged_sorted = merged[order]
+    is_new = np.empty(merged.size, dtype=bool)
+    is_new[:1] = True
+    np.not_equal(merged_sorted[1:], merged_sorted[:-1], out=is_new[1:])
+    union = merged_sorted[is_new]
+    positions = np.empty(merged.size, dtype=np.int64)
+    positions[order] = np.cumsum(is_new) - 1
+    return union, np.split(positions, np.cumsum(sizes)[:-1])
+
 
 arr_b = BufferArray(np.arange(10))
 
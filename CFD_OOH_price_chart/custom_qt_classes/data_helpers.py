@@ -12,7 +12,7 @@ if TYPE_CHECKING:
 from timeseries.classes import TimeSeries, TheoTimeSeries
 from dataclasses import dataclass, field, InitVar
 import numpy as np
-from custom_numpy import BufferArray
+from custom_numpy import BufferArray, GrowableArray
 from mathematics.numerics import MetricConverter
 
 @dataclass(slots=True, kw_only=True)
@@ -37,6 +37,9 @@ class SeriesContainer:
     _subset: bool = field(default_factory=lambda: False)
     _subset_idx: int|None = field(default_factory=lambda: None)
     view_range: List[List[float]] = field(default_factory=lambda: None)
+    _y_display: GrowableArray|None = field(default_factory=lambda: None)
+    _display_key: Tuple|None = field(default_factory=lambda: None)
+    _display_x_first: float|None = field(default_factory=lambda: None)
     
     def __post_init__(self, timeseries: Union["TimeSeries", "TheoTimeSeries"]):
         self.name = timeseries.name
@@ -50,7 +53,7 @@ class SeriesContainer:
         self.y_source=y
                 
         self.x_processed=self.x_source
-        self.y_processed=self.metric_engine.convert_to_display(self.metric_engine.static_param, self.y_source)
+        self.y_processed=self._display_series(self.x_source, self.y_source, reset=True)
         
         self.xmin, self.xmax = self.x_processed.min(), self.x_processed.max()
         self.ymin, self.ymax = self.y_processed.min(), self.y_processed.max()
@@ -95,8 +98,45 @@ class SeriesContainer:
             self.x_source, self.y_source = timeseries.get_data()
         
         self.x_processed = self.x_source
-        self.y_processed = self.metric_engine.convert_to_display(self.metric_engine.static_param, self.y_source)
-        self.update_from_point(self.x_processed[-1], self.y_processed[-1])
+        self.y_processed = self._display_series(self.x_source, self.y_source, reset=isinstance(timeseries, TheoTimeSeries))
+        n_new = min(timeseries.n_last_update, self.y_processed.size)
+        if n_new > 1:
+            self.update_from_points(self.x_processed[-n_new:], self.y_processed[-n_new:])
+        else:
+            self.update_from_point(self.x_processed[-1], self.y_processed[-1])
+
+    def _display_series(self,
+                        x: BufferArray|np.ndarray,
+                        y: BufferArray|np.ndarray,
+                        reset: bool=False,
+                        ) -> np.ndarray:
+        """
+        Display-converted y, cached and extended with only the points appended since the
+        last call. The cache is rebuilt when asked to, when the static parameter or the
+        scale has changed, or when the source no longer extends the cached series.
+        """
+        key = (self.metric_engine.static_param, self.metric_engine.display_function)
+        x_first = x[0] if x.size > 0 else None
+        n_cached = 0 if self._y_display is None else self._y_display.n
+        if (reset or n_cached == 0 or y.size < n_cached or not self._same_display_key(key)
+            or x_first != self._display_x_first):
+            self._y_display = GrowableArray(self.metric_engine.convert_to_display(key[0], y))
+            self._display_key = key
+            self._display_x_first = x_first
+        elif y.size > n_cached:
+            self._y_display.extend(self.metric_engine.convert_to_display(key[0], y[n_cached:]))
+        return self._y_display.get_array()
+
+    def _same_display_key(self, key: Tuple) -> bool:
+        """key equals the cached key, treating a nan static parameter (normalised to an all-nan view) as equal to nan."""
+        if self._display_key is None:
+            return False
+        (static_param, display_function), (static_param_cached, display_function_cached) = key, self._display_key
+        if display_function != display_function_cached:
+            return False
+        if static_param != static_param and static_param_cached != static_param_cached:
+            return True
+        return static_param == static_param_cached
         
     def update_from_point(self,
                           x: float,
@@ -114,6 +154,21 @@ class SeriesContainer:
         elif y < self.ymin:
             self.ymin = y
     
+    def update_from_points(self,
+                           x: np.ndarray,
+                           y: np.ndarray,
+                           ) -> None:
+        """update_from_point for the points appended by one batched update: the limits cover all of them."""
+        self.last_x = x[-1]
+        self.last_y = y[-1]
+        
+        self.xmin = min(self.xmin, x.min())
+        self.xmax = max(self.xmax, x.max())
+        y = y[~np.isnan(y)]
+        if y.size > 0:
+            self.ymin = min(self.ymin, y.min())
+            self.ymax = max(self.ymax, y.max())
+    
     def make_subset(self, timestamp):
         self._subset=True
         
@@ -11,6 +11,7 @@ from PySide6 import QtCore, QtGui
 
 from timeseries.classes import TimeSeries, TheoTimeSeries
 from custom_qt_classes import data_helpers
+from custom_qt_classes.redraw_scheduler import get_redraw_scheduler
 from mathematics import numerics as math_numerics
 import copy
 
@@ -92,18 +93,29 @@ class CustomPlotDataItem(pg.PlotDataItem):
         else:
             if self.parent().viewRange()[0][1] > self._series_container_full.last_x:
                 self._series_container_view.update_on_last_idx_min(*self._series_container_full.source_series())
-        self._process_update()        
+        self._schedule_update()        
         
     def create_subset(self, xmin):
         self._series_container_full.make_subset(xmin)
         self._series_container_view.update_from_data_metrics(self._series_container_full)
         self._process_update()
         
-    def _process_update(self):
+    def _update_major_value(self):
         if self._normalise_to_view:
             self.major_value=self._series_container_view.last_y
         else:
             self.major_value=self._series_container_full.last_y
+
+    def _process_update(self):
+        self._update_major_value()
+        get_redraw_scheduler().discard(self)
+        super().setData(*self._series_container_view.processed_series())
+
+    def _schedule_update(self):
+        self._update_major_value()
+        get_redraw_scheduler().mark_dirty(self)
+
+    def redraw(self):
         super().setData(*self._series_container_view.processed_series())
         
         
@@ -0,0 +1,75 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+if TYPE_CHECKING:
+    from custom_qt_classes.plot_data_item import CustomPlotDataItem
+
+import weakref
+import shiboken6
+from PySide6 import QtCore
+
+REDRAW_FPS = 60
+
+
+class RedrawScheduler(QtCore.QObject):
+    """
+    Coalesces plot redraws to at most one per frame.
+
+    Data updates only mark a CustomPlotDataItem dirty. When the frame timer fires every
+    dirty item calls setData once, and the view boxes they belong to defer their
+    range update until all of their items have been redrawn, so the limits are
+    recomputed once per subplot per frame rather than once per tick.
+
+    Pending items are held weakly, and items deleted or removed from their scene
+    before the frame are skipped rather than redrawn.
+    """
+    def __init__(self, fps: int=REDRAW_FPS, parent: QtCore.QObject=None):
+        super().__init__(parent)
+        self._dirty_items: weakref.WeakValueDictionary[int, CustomPlotDataItem] = weakref.WeakValueDictionary()
+        self._timer = QtCore.QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self.flush)
+        self.set_fps(fps)
+
+    def set_fps(self, fps: int) -> None:
+        self.fps = fps
+        self._timer.setInterval(max(1, int(1000 / fps)))
+
+    def mark_dirty(self, item: CustomPlotDataItem) -> None:
+        self._dirty_items[id(item)] = item
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def discard(self, item: CustomPlotDataItem) -> None:
+        self._dirty_items.pop(id(item), None)
+
+    def flush(self) -> None:
+        items = [item for item in self._dirty_items.values() if self._is_live(item)]
+        self._dirty_items.clear()
+
+        view_boxes = {}
+        for item in items:
+            view_box = item.parent()
+            if hasattr(view_box, "defer_view_limits"):
+                view_boxes[id(view_box)] = view_box
+
+        for view_box in view_boxes.values():
+            view_box.defer_view_limits(True)
+        try:
+            for item in items:
+                item.redraw()
+        finally:
+            for view_box in view_boxes.values():
+                view_box.defer_view_limits(False)
+
+    @staticmethod
+    def _is_live(item: CustomPlotDataItem) -> bool:
+        return shiboken6.isValid(item) and not item.scene() is None
+
+
+_scheduler: RedrawScheduler | None = None
+
+def get_redraw_scheduler() -> RedrawScheduler:
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = RedrawScheduler()
+    return _scheduler
@@ -14,6 +14,7 @@ from datetime import datetime, time, timedelta
 from dateutil import parser
 import pytz
 from custom_qt_classes.plot_data_item import CustomPlotDataItem
+from custom_qt_classes.redraw_scheduler import get_redraw_scheduler
 from custom_qt_classes.menu import CustomMenu
 from timeseries.classes import TheoTimeSeries
 from custom_qt_classes import data_helpers
@@ -52,6 +53,8 @@ class CustomViewBox(pg.ViewBox):
         self.data_limits={}
         
         self._auto_scaling=False
+        self._view_limits_deferred=False
+        self._view_limits_pending=False
 
         self.updating_x_range = False  
         self.updating_y_range=False
@@ -234,6 +237,8 @@ class CustomViewBox(pg.ViewBox):
                 self.update_view_limits(item)
                 
     def removeItem(self, item):
+        if isinstance(item, CustomPlotDataItem):
+            get_redraw_scheduler().discard(item)
         self.reset_view()
         return super().removeItem(item)
                 
@@ -251,6 +256,18 @@ class CustomViewBox(pg.ViewBox):
                            ):
 
         self.view_data_limits.check_set_limits(plot_data_item)
+        if self._view_limits_deferred:
+            self._view_limits_pending=True
+            return
+        self.apply_view_limits()
+
+    def defer_view_limits(self, flag: bool) -> None:
+        self._view_limits_deferred=flag
+        if not flag and self._view_limits_pending:
+            self._view_limits_pending=False
+            self.apply_view_limits()
+
+    def apply_view_limits(self):
         if not self._interacting:
             xmin, xmax, ymin, ymax = self.view_data_limits.view_limits()
             if not self.view_data_limits.view_within_bounds(1, *self.viewRange()[1]):
@@ -1,39 +1,201 @@
 import pandas as pd
+import numpy as np
 import os
-from typing import List, Dict
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Tuple, Callable, Any
 from . import utils as utils_historical
+from .classes import TickStore, EpicFileIndex, DayFile, TICK_COLUMNS
+
+
+def _get_folder_name(test_flag: bool) -> str:
+    if test_flag:
+        return "todays_data_test"
+    return "todays_data"
+
+def _get_data_dir(test_flag: bool) -> str:
+    return os.path.join(os.getcwd(), f"historical/data/{_get_folder_name(test_flag)}")
+
+def get_tick_store(test_flag: bool) -> TickStore:
+    return TickStore(root=os.path.join(os.getcwd(), f"historical/data/store/{_get_folder_name(test_flag)}"))
+
+def read_tick_file(file_path: str) -> Dict[str, np.ndarray]:
+    df = pd.read_csv(file_path, sep=",", header=None, names=list(TICK_COLUMNS)).dropna(how="all")
+    columns = {name : df[name].to_numpy(dtype=np.float64) for name in TICK_COLUMNS}
+    order = np.argsort(columns["UTM"], kind="stable")
+    return {name : values[order] for name, values in columns.items()}
+
+def _utm_bounds(utm: np.ndarray) -> Tuple[float, float]:
+    if utm.size == 0:
+        return np.nan, np.nan
+    utm_max = utm[-1]
+    if np.isnan(utm_max):
+        utm_max = np.nanmax(utm)
+    return float(utm[0]), float(utm_max)
+
+def compact_day(store: TickStore,
+                data_dir: str,
+                day: str,
+                file_name: str,
+                name_ig: str,
+                ) -> DayFile:
+    file_path = os.path.join(data_dir, day, file_name)
+    source_stat = os.stat(file_path)
+    if not store.is_current(day, name_ig, source_stat):
+        store.write_day(day, name_ig, read_tick_file(file_path), source_stat)
+    utm = store.load_day(day, name_ig)["UTM"]
+    utm_min, utm_max = _utm_bounds(utm)
+    return DayFile(day=day,
+                   file_name=file_name,
+                   rows=int(utm.size),
+                   utm_min=utm_min,
+                   utm_max=utm_max,
+                   source_mtime_ns=source_stat.st_mtime_ns,
+                   source_size=source_stat.st_size)
+
+def build_epic_file_index(data_dir: str,
+                          store: TickStore,
+                          ) -> EpicFileIndex:
+    index = EpicFileIndex(path=os.path.join(store.root, "index.json"),
+                          dir_mtimes=EpicFileIndex.read_dir_mtimes(data_dir))
+    for day in sorted(index.dir_mtimes):
+        if day == ".":
+            continue
+        for file_name in sorted(os.listdir(os.path.join(data_dir, day))):
+            name_ig, extension = os.path.splitext(file_name)
+            if extension == ".txt":
+                index.add(name_ig, compact_day(store, data_dir, day, file_name, name_ig))
+    index.save()
+    return index
+
+def get_epic_file_index(test_flag: bool,
+                        store: TickStore | None=None,
+                        ) -> EpicFileIndex:
+    if store is None:
+        store = get_tick_store(test_flag)
+    data_dir = _get_data_dir(test_flag)
+    index = EpicFileIndex.load(os.path.join(store.root, "index.json"))
+    if index is None or not index.is_current(data_dir):
+        index = build_epic_file_index(data_dir, store)
+    return index
+
+def compact_historical_data(test_flag: bool) -> EpicFileIndex:
+    """
+    One-off import of every CSV tick file into the columnar store, indexing each file on
+    the way. Entries whose source file is unchanged since the last import are skipped.
+    """
+    return build_epic_file_index(_get_data_dir(test_flag), get_tick_store(test_flag))
+
+def _refresh_day_file(store: TickStore,
+                      index: EpicFileIndex,
+                      data_dir: str,
+                      name_ig: str,
+                      day_file: DayFile,
+                      ) -> DayFile:
+    source_stat = os.stat(os.path.join(data_dir, day_file.day, day_file.file_name))
+    if day_file.is_current(source_stat):
+        return day_file
+    day_files = index.files_for(name_ig)
+    day_files[day_files.index(day_file)] = refreshed = compact_day(store, data_dir, day_file.day, day_file.file_name, name_ig)
+    index.save()
+    return refreshed
+
+def _slice_from(columns: Dict[str, np.ndarray],
+                utm_start: float,
+                ) -> Dict[str, np.ndarray]:
+    idx_start = max(np.searchsorted(columns["UTM"], utm_start, side="left") - 1, 0)
+    return {name : values[idx_start:] for name, values in columns.items()}
+
+def retrieve_columns(name_ig: str,
+                     test_flag: bool,
+                     store: TickStore | None=None,
+                     index: EpicFileIndex | None=None,
+                     start_time: float | None=None,
+                     ) -> Dict[str, np.ndarray]:
+    """
+    Raw UTM/BID/OFR columns of name_ig across its day files. With start_time (seconds),
+    days ending before it are not opened and the first day is cut to the last tick
+    before start_time onwards. If no day reaches start_time, the last day with data is
+    returned whole so the instrument still has a price.
+    """
+    data_dir = _get_data_dir(test_flag)
+    if store is None:
+        store = get_tick_store(test_flag)
+    if index is None:
+        index = get_epic_file_index(test_flag, store)
+    utm_start = None if start_time is None else 1000 * start_time
+    
+    day_columns = []
+    last_day_before = None
+    for day_file in list(index.files_for(name_ig)):
+        day_file = _refresh_day_file(store, index, data_dir, name_ig, day_file)
+        if day_file.overlaps(utm_start, None):
+            columns = store.load_day(day_file.day, name_ig)
+            if not utm_start is None and day_file.utm_min < utm_start:
+                columns = _slice_from(columns, utm_start)
+            day_columns.append(columns)
+        elif day_file.rows > 0:
+            last_day_before = day_file
+    if not day_columns and not last_day_before is None:
+        day_columns.append(store.load_day(last_day_before.day, name_ig))
+    if not day_columns:
+        return {name : np.empty(0, dtype=np.float64) for name in TICK_COLUMNS}
+    return {name : np.concatenate([columns[name] for columns in day_columns]) for name in TICK_COLUMNS}
 
 def retrieve_data(name_ig: str,
                   test_flag: bool,
+                  store: TickStore | None=None,
+                  index: EpicFileIndex | None=None,
+                  start_time: float | None=None,
                   ) -> pd.DataFrame:
-    working_dir = os.getcwd()
-    if test_flag:
-        todays_folder_name = "todays_data_test"
-    else:
-        todays_folder_name = "todays_data"
-    data_dir = os.path.join(working_dir, f"historical/data/{todays_folder_name}")
-    directories = [d for d in os.listdir(data_dir)]
-    dfs = []
-    for d in directories:
-        data_files = [fname for fname in os.listdir(f"{data_dir}/{d}") if os.path.isfile(os.path.join(f"{data_dir}/{d}", fname))]
-        for file in data_files:
-            if name_ig in file:
-                data_file_for_epic = file
-                break
-        df = pd.read_csv(f"{data_dir}/{d}/{data_file_for_epic}", sep=",", header=None, names=["UTM","BID","OFR"]).dropna(how="all")
-        df = df.dropna(how="all")
-        if not df.empty:
-            dfs.append(df)
-    return pd.concat(dfs, ignore_index=False) if dfs else pd.DataFrame(columns=["UTM","BID","OFR"])
+    return pd.DataFrame(retrieve_columns(name_ig, test_flag, store, index, start_time), columns=list(TICK_COLUMNS))
+
+def _timed_load(load_function: Callable[[str], Any],
+                name: str,
+                ) -> Tuple[Any, float]:
+    t_start = time.perf_counter()
+    result = load_function(name)
+    return result, time.perf_counter() - t_start
+
+def load_parallel(names: List[str],
+                  load_function: Callable[[str], Any],
+                  max_workers: int | None=None,
+                  ) -> Tuple[Dict[str, Any], Dict[str, float]]:
+    """
+    Runs load_function(name) for every name on a bounded thread pool. Returns the
+    results and the wall time of each load, both keyed and ordered as names.
+    """
+    if max_workers is None:
+        max_workers = min(8, os.cpu_count() or 1)
+    max_workers = max(1, min(max_workers, len(names)))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {name : executor.submit(_timed_load, load_function, name) for name in names}
+        results, timings = {}, {}
+        for name, future in futures.items():
+            results[name], timings[name] = future.result()
+    return results, timings
+
+def print_load_timings(timings: Dict[str, float],
+                       t_total: float,
+                       ) -> None:
+    for name, t_load in sorted(timings.items(), key=lambda item: item[1], reverse=True):
+        print(f"{name:<10} loaded in {t_load:.3f}s")
+    print(f"Loaded {len(timings)} instruments in {t_total:.3f}s (sum of loads {sum(timings.values()):.3f}s)")
 
 def get_historical_data(all_instruments: List[str],
                         capital_ig_map: Dict[str, str],
                         test_flag: bool,
-                        ) -> Dict[str, pd.DataFrame]:
-    df_dict={}
-    for name_capital in all_instruments:
-        name_ig = capital_ig_map[name_capital]
-        df = retrieve_data(name_ig, test_flag) 
-        df_cleaned = utils_historical.clean_data(df, test_flag)
-        df_dict[name_capital]=df_cleaned
-    return df_dict
+                        start_time: float | None=None,
+                        max_workers: int | None=None,
+                        ) -> Dict[str, Dict[str, np.ndarray]]:
+    store = get_tick_store(test_flag)
+    index = get_epic_file_index(test_flag, store)
+
+    def _load(name_capital: str) -> Dict[str, np.ndarray]:
+        columns = retrieve_columns(capital_ig_map[name_capital], test_flag, store, index, start_time)
+        return utils_historical.clean_columns(columns, test_flag)
+
+    t_start = time.perf_counter()
+    data_dict, timings = load_parallel(all_instruments, _load, max_workers)
+    print_load_timings(timings, time.perf_counter() - t_start)
+    return data_dict
@@ -0,0 +1,161 @@
+from __future__ import annotations
+from typing import Dict, List, Tuple
+
+from dataclasses import dataclass, field, asdict
+import json
+import os
+import threading
+import numpy as np
+
+TICK_COLUMNS: Tuple[str, str, str] = ("UTM", "BID", "OFR")
+
+
+@dataclass(slots=True, kw_only=True)
+class TickStore:
+    """
+    Columnar on-disk copy of the raw tick files.
+
+    Each instrument/day is stored as one float64 .npy file per column under
+    root/<day>/<epic>/<column>.npy, sorted by UTM, so that a load is a memory map with
+    no text parsing. manifest.json records the row count and the stat of the source
+    file each entry was compacted from, which is how stale entries are detected.
+    """
+    root: str
+    manifest: Dict[str, Dict[str, Dict[str, int]]] = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def __post_init__(self):
+        if os.path.isfile(self.manifest_path()):
+            with open(self.manifest_path(), "r") as f:
+                self.manifest = json.load(f)
+
+    def manifest_path(self) -> str:
+        return os.path.join(self.root, "manifest.json")
+
+    def entry_dir(self, day: str, epic: str) -> str:
+        return os.path.join(self.root, day, epic)
+
+    def is_current(self,
+                   day: str,
+                   epic: str,
+                   source_stat: os.stat_result,
+                   ) -> bool:
+        entry = self.manifest.get(day, {}).get(epic, None)
+        if entry is None:
+            return False
+        return entry["source_mtime_ns"] == source_stat.st_mtime_ns and entry["source_size"] == source_stat.st_size
+
+    def write_day(self,
+                  day: str,
+                  epic: str,
+                  columns: Dict[str, np.ndarray],
+                  source_stat: os.stat_result,
+                  ) -> None:
+        entry_dir = self.entry_dir(day, epic)
+        os.makedirs(entry_dir, exist_ok=True)
+        for name in TICK_COLUMNS:
+            np.save(os.path.join(entry_dir, f"{name}.npy"), np.ascontiguousarray(columns[name], dtype=np.float64))
+
+        with self._lock:
+            self.manifest.setdefault(day, {})[epic] = {"rows" : int(columns[TICK_COLUMNS[0]].size),
+                                                       "source_mtime_ns" : source_stat.st_mtime_ns,
+                                                       "source_size" : source_stat.st_size,
+                                                       }
+            self._save_manifest()
+
+    def _save_manifest(self) -> None:
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = f"{self.manifest_path()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.manifest, f, indent=1)
+        os.replace(tmp_path, self.manifest_path())
+
+    def load_day(self,
+                 day: str,
+                 epic: str,
+                 ) -> Dict[str, np.ndarray]:
+        if self.manifest[day][epic]["rows"] == 0:
+            return {name : np.empty(0, dtype=np.float64) for name in TICK_COLUMNS}
+        entry_dir = self.entry_dir(day, epic)
+        return {name : np.load(os.path.join(entry_dir, f"{name}.npy"), mmap_mode="r") for name in TICK_COLUMNS}
+
+
+@dataclass(slots=True, kw_only=True)
+class DayFile:
+    day: str
+    file_name: str
+    rows: int
+    utm_min: float
+    utm_max: float
+    source_mtime_ns: int
+    source_size: int
+
+    def is_current(self, source_stat: os.stat_result) -> bool:
+        return self.source_mtime_ns == source_stat.st_mtime_ns and self.source_size == source_stat.st_size
+
+    def overlaps(self,
+                 utm_start: float | None,
+                 utm_end: float | None,
+                 ) -> bool:
+        if self.rows == 0:
+            return False
+        if not utm_start is None and self.utm_max < utm_start:
+            return False
+        if not utm_end is None and self.utm_min > utm_end:
+            return False
+        return True
+
+
+@dataclass(slots=True, kw_only=True)
+class EpicFileIndex:
+    """
+    Maps each IG epic to its day files (ordered by day) with row counts and UTM bounds.
+
+    The day listing is trusted while the modification times of the data directory and
+    of every day directory match dir_mtimes. Individual entries are refreshed by the
+    loader when their source file has been appended to since it was indexed.
+    """
+    path: str
+    dir_mtimes: Dict[str, int] = field(default_factory=dict)
+    epic_files: Dict[str, List[DayFile]] = field(default_factory=dict)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    @classmethod
+    def load(cls, path: str) -> EpicFileIndex | None:
+        if not os.path.isfile(path):
+            return None
+        with open(path, "r") as f:
+            raw = json.load(f)
+        epic_files = {epic : [DayFile(**day_file) for day_file in day_files] for epic, day_files in raw["epic_files"].items()}
+        return cls(path=path, dir_mtimes=raw["dir_mtimes"], epic_files=epic_files)
+
+    def save(self) -> None:
+        with self._lock:
+            raw = {"dir_mtimes" : self.dir_mtimes,
+                   "epic_files" : {epic : [asdict(day_file) for day_file in day_files] for epic, day_files in self.epic_files.items()}
+                   }
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(raw, f, indent=1)
+            os.replace(tmp_path, self.path)
+
+    @staticmethod
+    def read_dir_mtimes(data_dir: str) -> Dict[str, int]:
+        dir_mtimes = {"." : os.stat(data_dir).st_mtime_ns}
+        for day in os.listdir(data_dir):
+            day_dir = os.path.join(data_dir, day)
+            if os.path.isdir(day_dir):
+                dir_mtimes[day] = os.stat(day_dir).st_mtime_ns
+        return dir_mtimes
+
+    def is_current(self, data_dir: str) -> bool:
+        return self.read_dir_mtimes(data_dir) == self.dir_mtimes
+
+    def add(self, epic: str, day_file: DayFile) -> None:
+        day_files = self.epic_files.setdefault(epic, [])
+        day_files.append(day_file)
+        day_files.sort(key=lambda entry: entry.day)
+
+    def files_for(self, epic: str) -> List[DayFile]:
+        return self.epic_files.get(epic, [])
@@ -1,29 +1,35 @@
-import pandas as pd
-import os
+import numpy as np
 from typing import List, Dict
 from time_helpers.classes import PatchedDateTime
 
-def clean_data(df: pd.DataFrame,
-               test_flag: bool,
-               ) -> Dict[str, pd.DataFrame]:
-    df = df.drop_duplicates(subset=["UTM"], keep="first")
-    df = df.sort_values(by=["UTM"])
-    
-    df = df.rename(columns={"UTM" : "timestamp",
-                            "BID" : "bid",
-                            "OFR" : "ask"})
-    
-    df["timestamp"] = df["timestamp"] / 1000
-    df = df.set_index("timestamp", drop=True)
-    df = df.dropna(axis=0)
-    
-    df[["bid", "ask"]] = df[["bid", "ask"]].ffill()
-    mask = df.notna().all(axis=1)
-    
-    first_good = mask.idxmax()   
-    df = df.loc[first_good :]
-    if test_flag:
-        df = df.loc[df.index <= PatchedDateTime.now().timestamp()]
-    return df
 
+def clean_columns(columns: Dict[str, np.ndarray],
+                  test_flag: bool,
+                  ) -> Dict[str, np.ndarray]:
+    """
+    Single pass over the raw UTM/BID/OFR columns: stable sort by UTM, keep the first tick
+    of each UTM, ms -> s and drop the rows missing either side. Returns float64
+    "timestamp", "bid" and "ask" arrays.
+    """
+    utm = columns["UTM"]
+    order = np.argsort(utm, kind="stable")
+    timestamps = utm[order]
+
+    keep = ~np.isnan(timestamps)
+    np.not_equal(timestamps[1:], timestamps[:-1], out=keep[1:], where=keep[1:])
+    order = order[keep]
+    timestamps = timestamps[keep]
 
+    bid = columns["BID"][order]
+    ask = columns["OFR"][order]
+    valid = ~(np.isnan(bid) | np.isnan(ask))
+    timestamps, bid, ask = timestamps[valid], bid[valid], ask[valid]
+    timestamps /= 1000
+
+    idx_end = timestamps.size
+    if test_flag:
+        idx_end = int(np.searchsorted(timestamps, PatchedDateTime.now().timestamp(), side="right"))
+    return {"timestamp" : timestamps[:idx_end],
+            "bid" : bid[:idx_end],
+            "ask" : ask[:idx_end],
+            }
@@ -3,11 +3,204 @@ from typing import Callable, Sequence, List, Dict, NoReturn, Union, Tuple, Any,
 if TYPE_CHECKING:
     from subplot_structure.classes import SubPlotStructure
 
-import pandas as pd
 import numpy as np
 from mathematics import numerics as math_numerics
 from . import classes as classes_ig_measuring
 
+
+def _returns_and_deltas(prices: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    pct_returns = 100 * (prices / prices[0] - 1)
+    deltas = np.empty_like(pct_returns)
+    deltas[:1] = np.nan
+    np.subtract(pct_returns[1:], pct_returns[:-1], out=deltas[1:])
+    return pct_returns, deltas
+
+def _last_at_timestamp(timestamps: np.ndarray,
+                       values: np.ndarray,
+                       ) -> np.ndarray:
+    """values[i] replaced by the value of the last tick sharing timestamps[i] (what a dict keyed by timestamp holds)."""
+    return values[np.searchsorted(timestamps, timestamps, side="right") - 1]
+
+def _match_leader_ticks(timestamps_leader: np.ndarray,
+                        delta_leader: np.ndarray,
+                        timestamps_follower: np.ndarray,
+                        dt: float,
+                        ) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Sorted join of the leader ticks onto the follower ticks. A leader tick with a delta
+    is matched to the follower ticks in [ts, ts + dt] if it is more than dt after the
+    previous leader tick with a delta. Returns, for every leader tick, the index of its
+    first follower tick and the number of follower ticks in its window (0 if skipped).
+    """
+    idx_valid = np.flatnonzero(~np.isnan(delta_leader))
+    timestamps_valid = timestamps_leader[idx_valid]
+    barriers = np.empty_like(timestamps_valid)
+    barriers[:1] = 0
+    barriers[1:] = timestamps_valid[:-1] + dt
+    considered = np.zeros(timestamps_leader.size, dtype=bool)
+    considered[idx_valid] = timestamps_valid > barriers
+
+    idx_follower = np.searchsorted(timestamps_follower, timestamps_leader, side="left")
+    idx_follower_end = np.searchsorted(timestamps_follower, timestamps_leader + dt, side="right")
+    n_follower = np.where(considered, idx_follower_end - idx_follower, 0)
+    return np.minimum(idx_follower, timestamps_follower.size - 1), n_follower
+
+def _count_rounded_weights(weight_values: np.ndarray) -> Dict[float, int]:
+    """Occurrences of each weight rounded to 0.1, less one, keyed in order of first appearance."""
+    counts = {}
+    for weight in weight_values.tolist():
+        key = round(weight, 1)
+        if key in counts:
+            counts[key] += 1
+        else:
+            counts[key] = 0
+    return counts
+
+def _weight_changes(weight_list: List[float],
+                    theo_weight: Dict[str, Union[float, Dict[float, float]]],
+                    dw: float,
+                    k: int,
+                    ) -> Tuple[List[int], List[float]]:
+    """
+    Splits the weights into complete blocks of k (the last, possibly full, block is left
+    out) and maps every weight onto the main theoretical weight where it or one of its
+    ratios is within dw. Returns the start of every block with fewer than k/2 such
+    weights and the mapped weights.
+    """
+    n_blocks = max(0, (len(weight_list) - 1) // k)
+    weights = np.asarray(weight_list[:n_blocks * k], dtype=np.float64)
+    resp_weights = weights.copy()
+    same_response = np.abs(weights - theo_weight["main"]) < dw
+    for ratio in theo_weight["ratio_map"].values():
+        scaled = weights * ratio
+        hit = ~same_response & (np.abs(scaled - theo_weight["main"]) < dw)
+        resp_weights[hit] = np.abs(scaled[hit])
+        same_response |= hit
+    n_same = same_response.reshape(n_blocks, k).sum(axis=1)
+    weight_changes = (k * np.flatnonzero(n_same < k / 2)).tolist()
+    return weight_changes, resp_weights.tolist()
+
+
+def create_follower(name_follower: str,
+                    leader_names: List[str],
+                    price_data: Dict[str, Tuple[np.ndarray, np.ndarray]],
+                    config: Dict[str, Any],
+                    ) -> Tuple[classes_ig_measuring.Follower, Dict[str, classes_ig_measuring.Leader]]:
+    """
+    Calibrates name_follower against each of leader_names from the (timestamps, prices)
+    history in price_data and returns the Follower with its Leader objects, ready to be
+    fed ticks through update_from_instrument. Leaders with fewer than n_max ticks, fewer
+    than three matched responses or no single-tick response to calibrate from are left
+    out.
+    """
+    timestamps_follower, prices_follower = price_data[name_follower]
+    init_price_follower = prices_follower[0]
+    pct_returns_follower, delta_follower = _returns_and_deltas(prices_follower)
+    delta_follower_at_ts = _last_at_timestamp(timestamps_follower, delta_follower)
+    
+    leader_container={}
+    response_data_delta = {name : {} for name in leader_names}
+    leader_callbacks={}
+    last_timestamp_leaders={}
+    
+    dynamic_medians={}
+    subset_dynamic_medians={}
+    subset_dynamic_medians_prev={}
+    metrics={}
+    sliding_medians={}
+    weight_changes_container={name : {} for name in leader_names} 
+    theo_weights={}
+    k = config["weights"]["n_max"]
+    session_window = config["weights"]["session_window"]
+    for name_leader in leader_names:
+        timestamps_leader, prices_leader = price_data[name_leader]
+        init_price_leader=prices_leader[0]
+        pct_returns_leader, delta_leader = _returns_and_deltas(prices_leader)
+        last_delta_leader = delta_leader[-1]
+        last_timestamp_leader=timestamps_leader[-1]
+
+        if len(timestamps_leader) < k:
+            continue
+
+        delta_leader_at_ts = _last_at_timestamp(timestamps_leader, delta_leader)
+        idx_follower, n_follower = _match_leader_ticks(timestamps_leader,
+                                                       delta_leader_at_ts,
+                                                       timestamps_follower,
+                                                       config["tolerance"]["dt"])
+        matched = (n_follower > 0) & (delta_leader_at_ts != 0)
+        d_leaders = delta_leader_at_ts[matched]
+        d_followers = delta_follower_at_ts[idx_follower[matched]]
+        weight_values = 100 * (d_followers / d_leaders)
+        counts = _count_rounded_weights(weight_values[n_follower[matched] == 1])
+        if not counts or weight_values.size < 3:
+            # no single-tick responses to calibrate a theoretical weight from, or too
+            # few weights to seed the subset medians
+            continue
+
+        weights = dict(zip(timestamps_leader[matched].tolist(), weight_values.tolist()))
+        inner_dict = {name_follower : d_followers[-1].item(),
+                      name_leader : d_leaders[-1].item()}
+        weight = weight_values[-1].item()
+        sorted_dict = dict(sorted(counts.items(), key=lambda item: item[1], reverse=True))
+        filtered_weights = [weight for idx, weight in enumerate(sorted_dict.keys()) if idx < 6]
+        
+        theo_weights[name_leader] = {"main" : filtered_weights[0],
+                                    "ratio_map" : {weight : filtered_weights[0] / weight for weight in filtered_weights[1:] if weight > 0}}
+        ts_leader = timestamps_leader[-1]
+        response_data_delta[name_leader][ts_leader] = inner_dict
+        weights[ts_leader] = weight
+        leader_container[name_leader] = classes_ig_measuring.Leader(name=name_leader,
+                                                                    init_price=init_price_leader,
+                                                                    last_timestamp=last_timestamp_leader,
+                                                                    last_price=prices_leader[-1],
+                                                                    last_return=pct_returns_leader[-1],
+                                                                    last_delta=last_delta_leader,
+                                                                    retention=config["history"]["retention"]
+                                                                    )
+        leader_callbacks[name_leader] = leader_container[name_leader].last_values
+        last_timestamp_leaders[name_leader] = last_timestamp_leader
+
+        weight_list = list(weights.values())
+        dynamic_medians[name_leader] = math_numerics.SlidingMedian(session_window, weight_list[-session_window:])
+        subset_dynamic_medians[name_leader] = math_numerics.DynamicMedian(weight_list[-2:])
+        subset_dynamic_medians_prev[name_leader] = math_numerics.DynamicMedian(weight_list[-2-k:-2])
+
+        metrics[name_leader] = dynamic_medians[name_leader].median()
+        weight_changes, resp_collection = _weight_changes(weight_list,
+                                                          theo_weights[name_leader],
+                                                          config["tolerance"]["dw"],
+                                                          k)
+        weight_changes_container[name_leader]=weight_changes
+        sliding_medians[name_leader] = math_numerics.SlidingMedian(k, resp_collection[-k:])
+    
+    weight_metrics = classes_ig_measuring.WeightMetrics(name_follower=name_follower,
+                                                        leader_names=leader_names,
+                                                        configs=config,
+                                                        dynamic_median_container=dynamic_medians,
+                                                        subset_median_container=subset_dynamic_medians,
+                                                        subset_median_container_prev=subset_dynamic_medians_prev,
+                                                        weight_changes_container=weight_changes_container,
+                                                        sliding_median_container=sliding_medians,
+                                                        theo_weights=theo_weights,
+                                                        metrics=metrics,
+                                                        notify_median_change_callbacks={},
+                                                        adjustment_listeners={},                                                            
+                                                        n_max=k)
+
+    follower_object = classes_ig_measuring.Follower(name=name_follower,
+                                                    init_price=init_price_follower,
+                                                    last_timestamp=timestamps_follower[-1],
+                                                    last_price=prices_follower[-1],
+                                                    last_return=pct_returns_follower[-1],
+                                                    last_delta=delta_follower[-1],
+                                                    response_data_delta=response_data_delta,
+                                                    weight_metrics=weight_metrics,
+                                                    leader_callbacks=leader_callbacks,
+                                                    leaders_last_ts=last_timestamp_leaders,
+                                                    retention=config["history"]["retention"])
+    return follower_object, leader_container
+
+
 def create_weight_metrics(subplot_structure_container: Dict[str, SubPlotStructure],
                           configs: Dict[str, str[Dict[str, List[str]]]]
                         ) -> None:   
@@ -27,199 +220,19 @@ def create_weight_metrics(subplot_structure_container: Dict[str, SubPlotStructur
             
             if all([name in subplot_structure.instrument_names for name in leader_names]):
                 
-            
                 for name_follower in follower_names:
-                    instrument_follower = instrument_container[name_follower]
-                    timeseries_follower = timeseries_container[name_follower]
-                    
-
-                    
-                    
-                    timestamps_follower, prices_follower = timeseries_follower.get_data()
-                    init_price_follower = prices_follower[0]
-                    price_series_follower = pd.Series(prices_follower, index=timestamps_follower)
-                    pct_returns_follower = 100 * (price_series_follower / init_price_follower - 1)
-                    delta_follower_map = pct_returns_follower.diff().to_dict()
-                    delta_follower = pct_returns_follower.diff().values
-                    price_follower = price_series_follower.to_dict()
-                    
-                    timeseries_leaders={}
-                    response_data_delta = {name : {} for name in leader_names}
-                    leader_callbacks={}
-                    last_timestamp_leaders={}
-                    
-                    dynamic_medians={}
-                    subset_dynamic_medians={}
-                    subset_dynamic_medians_prev={}
-                    metrics={}
-                    weight_list_container={}
-                    weight_list_container_n={}
-                    weight_changes_container={name : {} for name in leader_names} 
-                    theo_weights={}
-                    for name_leader in leader_names:
-                        timeseries_leader = timeseries_container[name_leader]
-
-                        
-                        timestamps_leader, prices_leader = timeseries_leader.get_data()
-                        init_price_leader=prices_leader[0]
-                        price_series_leader = pd.Series(prices_leader, index=timestamps_leader)
-                        pct_returns_leader = 100 * (price_series_leader / init_price_leader - 1)
-                        
-                        delta_leader = pct_returns_leader.diff()
-                        last_delta_leader = delta_leader.iloc[-1]
-                        last_timestamp_leader=timestamps_leader[-1]
-                        delta_leader = delta_leader.to_dict()
-                        price_leader = price_series_leader.to_dict()
+                    price_data = {name : timeseries_container[name].get_data() for name in [name_follower, *leader_names]}
+                    follower_object, leader_objects = create_follower(name_follower, leader_names, price_data, config)
 
-                        weights={}
-                        
-                        
-                        ts_weights=[]
-                        k = 20
-                        weight_ts_diff_map = {}
-                        counts={}
-                        barrier=0
-
-                        if len(timestamps_leader) < k:
-                            continue
-
-                        
-                        for idx, ts_leader in enumerate(timestamps_leader):
-                            if np.isnan(delta_leader[ts_leader]):
-                                continue
-                            ts_follower = timestamps_follower[(ts_leader <= timestamps_follower) & (ts_leader + config["tolerance"]["dt"] >= timestamps_follower) & (ts_leader > barrier)]
-                            barrier = ts_leader + config["tolerance"]["dt"]
-                            if len(ts_follower) > 0 and delta_leader[ts_leader] != 0:
-                                d_leader = delta_leader[ts_leader]
-                                d_follower = delta_follower_map[ts_follower[0]]
-                                inner_dict = {name_follower : d_follower,
-                                            name_leader : d_leader}
-                                weight = 100 * (d_follower / d_leader)
-                                weights[ts_leader] =weight
-                            if len(ts_follower) == 1 and delta_leader[ts_leader] != 0:
-                                d_leader = delta_leader[ts_leader]
-                                d_follower = delta_follower_map[ts_follower[0]]
-                                inner_dict = {name_follower : d_follower,
-                                            name_leader : d_leader}
-                                weight = 100 * (d_follower / d_leader)
-                                weights[ts_leader] =weight
-
-                                diff = ts_follower[0] - ts_leader
-                                if not round(weight,1) in weight_ts_diff_map:
-                                    
-                                    weight_ts_diff_map[round(weight, 1)]=[np.floor(diff / 0.005) * 0.005]
-                                    weight_ts_diff_map[round(weight, 1)] = []
-                                else:
-                                    weight_ts_diff_map[round(weight,1)].append(np.floor(diff / 0.005) * 0.005)
-                                                    
-                        for key, values in weight_ts_diff_map.items(): 
-                            counts[key] = len(values)
-                            weight_ts_diff_map[key] = np.median(values)
-                        
-                        sorted_dict = dict(sorted(counts.items(), key=lambda item: item[1], reverse=True))
-                        filtered_weights = [weight for idx, weight in enumerate(sorted_dict.keys()) if idx < 6]
-                        
-                        theo_weights[name_leader] = {"main" : filtered_weights[0],
-                                                    "ratio_map" : {weight : filtered_weights[0] / weight for weight in filtered_weights[1:] if weight > 0}}
-                        response_data_delta[name_leader][ts_leader] = inner_dict
-                        weights[ts_leader] = weight
-                        ts_weights.append(ts_leader)
-                        leader_object = classes_ig_measuring.Leader(name=name_leader,
-                                                                    init_price=init_price_leader,
-                                                                    last_timestamp=last_timestamp_leader,
-                                                                    last_price=prices_leader[-1],
-                                                                    last_return=pct_returns_leader.iloc[-1],
-                                                                    last_delta=last_delta_leader                                                        
-                                                                    )
-
-                        instrument_parent_leader = instrument_container[name_leader]
-
-                        instrument_parent_leader.add_update_callback(leader_object.update_from_instrument)
+                    for name_leader, leader_object in leader_objects.items():
+                        instrument_container[name_leader].add_update_callback(leader_object.update_from_instrument)
                         
                         if name_leader in leader_container:
                             leader_container[name_leader][name_follower] = leader_object
                         else:
                             leader_container[name_leader] = {name_follower : leader_object}
-                        
-                        
-                        leader_callbacks[name_leader] = leader_object.last_values
-                        last_timestamp_leaders[name_leader] = last_timestamp_leader
 
-                        timeseries_leaders[name_leader] = timeseries_leader
-
-                        
-                        dynamic_medians[name_leader] = math_numerics.DynamicMedian(list(weights.values()))
-                        
-
-                        subset_dynamic_medians[name_leader] = math_numerics.DynamicMedian(dynamic_medians[name_leader].get_values()[-2:])
-                        subset_dynamic_medians_prev[name_leader] = math_numerics.DynamicMedian(dynamic_medians[name_leader].get_values()[-2-k:-2])
-                        weight_list_container[name_leader] = dynamic_medians[name_leader].get_values()
-
-                        metrics[name_leader] = dynamic_medians[name_leader].median()
-                        ki=k
-                        ki_prev=0
-                        weight_changes=[]
-                        resp_collection=[]
-                        while ki < len(dynamic_medians[name_leader].get_values()):
-                            w = weight_list_container[name_leader][ki_prev:ki]
-                            bools=[]
-                            resp_w=[]
-                            for wi in w:
-                                if abs(wi - theo_weights[name_leader]["main"]) < config["tolerance"]["dw"]:
-                                    resp_w.append(wi)
-                                    bools.append(True)
-                                    continue
-                                else:
-                                    continue_flag=False
-                                    for ratio in theo_weights[name_leader]["ratio_map"].values():
-                                        
-                                        if abs(wi * ratio - theo_weights[name_leader]["main"]) < config["tolerance"]["dw"]:
-                                            bools.append(True)
-                                            continue_flag=True
-                                            resp_w.append(abs(wi * ratio))
-                                            break
-                                if continue_flag:
-                                    continue
-                                resp_w.append(wi)
-                                bools.append(False)
-                            if sum(bools) < k/2:
-                                weight_changes.append(ki_prev)
-                            resp_collection = resp_collection + resp_w
-                            ki_prev=ki
-                            ki+=k
-                        weight_changes_container[name_leader]=weight_changes
-                        weight_list_container_n[name_leader]=resp_collection
-                            
-                            
-                    
-                    weight_metrics = classes_ig_measuring.WeightMetrics(name_follower=name_follower,
-                                                                        leader_names=leader_names,
-                                                                        configs=config,
-                                                                        dynamic_median_container=dynamic_medians,
-                                                                        subset_median_container=subset_dynamic_medians,
-                                                                        subset_median_container_prev=subset_dynamic_medians_prev,
-                                                                        weight_changes_container=weight_changes_container,
-                                                                        
-                                                                        weight_list_container=weight_list_container,
-                                                                        weight_list_container_n=weight_list_container_n,
-                                                                        theo_weights=theo_weights,
-                                                                        metrics=metrics,
-                                                                        notify_median_change_callbacks={},
-                                                                        adjustment_listeners={},                                                            
-                                                                        n_max=20)
-
-                    follower_object = classes_ig_measuring.Follower(name=name_follower,
-                                                                    init_price=init_price_follower,
-                                                                    last_timestamp=timestamps_follower[-1],
-                                                                    last_price=prices_follower[-1],
-                                                                    last_return=pct_returns_follower.iloc[-1],
-                                                                    last_delta=delta_follower[-1],
-                                                                    response_data_delta=response_data_delta,
-                                                                    weight_metrics=weight_metrics,
-                                                                    leader_callbacks=leader_callbacks,
-                                                                    leaders_last_ts=last_timestamp_leaders)
-                    instrument_parent_follower = instrument_container[name_follower]
-                    instrument_parent_follower.add_update_callback(follower_object.update_from_instrument)
+                    instrument_container[name_follower].add_update_callback(follower_object.update_from_instrument)
                     
                     follower_container[name_follower] = follower_object
                 subplot_structure.ig_measuring_followers = follower_container
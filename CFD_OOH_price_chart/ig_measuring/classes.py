@@ -7,9 +7,11 @@ from dataclasses import dataclass, field, asdict
 from abc import ABC, abstractmethod
 from typing import Dict, Callable
 from pprint import pformat
-from mathematics.numerics import DynamicMedian
+from mathematics.numerics import DynamicMedian, SlidingMedian
+from custom_numpy import GrowableArray
 import numpy as np
 
+LEADER_MIN_TRIM = 1024
 
 
 @dataclass(slots=True, kw_only=True)
@@ -17,11 +19,10 @@ class WeightMetrics:
     name_follower: str
     leader_names: List[str]
     configs: Dict[str, Dict[str, Union[float, int]]]
-    dynamic_median_container: Dict[str, DynamicMedian] 
+    dynamic_median_container: Dict[str, SlidingMedian]  # session median: exact over the last weights.session_window weights
     subset_median_container: Dict[str, DynamicMedian]  
     subset_median_container_prev: Dict[str, DynamicMedian] 
-    weight_list_container: Dict[str, List[float]]
-    weight_list_container_n: Dict[str, List[float]]
+    sliding_median_container: Dict[str, SlidingMedian]
     weight_changes_container: Dict[str, Tuple[float, float]]
     
     theo_weights: Dict[str, Dict[str, Dict[str, float]]]
@@ -61,7 +62,7 @@ class WeightMetrics:
                     break
         self.same_response[name_leader].append(same_response)
         self.resp[name_leader].append(weight)
-        self.weight_list_container_n[name_leader].append(resp_w)
+        self.sliding_median_container[name_leader].insert(resp_w)
         if len(self.same_response[name_leader]) == self.n_max:
             n_true = sum(self.same_response[name_leader])
             if n_true < self.n_max / 2:
@@ -73,7 +74,6 @@ class WeightMetrics:
             
         self.dynamic_median_container[name_leader].insert(weight)
         self.subset_median_container[name_leader].insert(weight)
-        self.weight_list_container[name_leader].append(resp_w)
         self.metrics[name_leader] = self.dynamic_median_container[name_leader].median()
     
         self._weight_counter_container[name_leader]+=1 
@@ -84,7 +84,7 @@ class WeightMetrics:
             self.subset_median_container[name_leader]=DynamicMedian(self.subset_median_container[name_leader].get_values()[-2:])
 
         for name, callback in self.update_callbacks.items():
-            callback(np.median(self.weight_list_container_n[name][-self.n_max:]))    
+            callback(self.sliding_median_container[name].median())    
             
     def _check_weight_intervals(self, name_leader):
         
@@ -136,26 +136,48 @@ class Node(ABC):
 
 @dataclass(slots=True, kw_only=True)
 class Leader(Node):
-    last_response_container: Dict[float, float] = field(default_factory=lambda: {})
-        
+    """
+    The leader's deltas are kept as sorted timestamp/delta buffers so that the lookup
+    for a follower tick is a binary search. Ticks older than retention seconds before
+    the latest one are dropped in chunks, keeping the history bounded over a session.
+    """
+    retention: float
+    history_timestamps: GrowableArray = field(default_factory=GrowableArray)
+    history_deltas: GrowableArray = field(default_factory=GrowableArray)
 
     def update_from_instrument(self, instrument: PriceInstrument):
         self.last_timestamp = instrument.timestamp
         self.last_price = 0.5 *(instrument.bid+instrument.ask)
         returns = 100 * (self.last_price / self.init_price - 1)
         self.last_delta = returns - self.last_return
-        self.last_response_container[self.last_timestamp]=self.last_delta
+        self._append_history(self.last_timestamp, self.last_delta)
         self.last_return = returns
 
+    def _append_history(self, timestamp, delta):
+        last_timestamp = self.history_timestamps.get_last_value()
+        if timestamp == last_timestamp:
+            self.history_deltas.get_array()[-1] = delta
+            return
+        if timestamp < last_timestamp:
+            return
+        self.history_timestamps.append(timestamp)
+        self.history_deltas.append(delta)
+        self._trim_history()
+
+    def _trim_history(self):
+        timestamps = self.history_timestamps.get_array()
+        if timestamps[0] >= timestamps[-1] - self.retention:
+            return
+        n_drop = int(np.searchsorted(timestamps, timestamps[-1] - self.retention, side="left"))
+        if n_drop >= max(timestamps.size // 2, LEADER_MIN_TRIM):
+            self.history_timestamps.drop_first(n_drop)
+            self.history_deltas.drop_first(n_drop)
+
     def last_values(self, timestamp_follower):
-        last_timestamp, last_delta = self.last_timestamp, self.last_delta
-        for ts, delta in self.last_response_container.items():  
-            if ts < timestamp_follower:
-                last_timestamp = ts
-                last_delta=delta
-            else:
-                break
-        return last_timestamp, last_delta
+        idx = int(np.searchsorted(self.history_timestamps.get_array(), timestamp_follower, side="left")) - 1
+        if idx < 0:
+            return self.last_timestamp, self.last_delta
+        return self.history_timestamps.get_array()[idx], self.history_deltas.get_array()[idx]
 
 @dataclass(slots=True, kw_only=True)
 class Follower(Node):
@@ -163,6 +185,7 @@ class Follower(Node):
     weight_metrics: WeightMetrics 
     leader_callbacks: Dict[str, Callable]
     leaders_last_ts: Dict[str, float]
+    retention: float
     cached_data_follower: Dict[str, float] = field(default_factory=lambda: {"timestamp": None, "delta": None})
     cached_data_leader: Dict[str, float] = field(default_factory=lambda: {"name": None, "timestamp": None, "delta": None})
 
@@ -184,8 +207,17 @@ class Follower(Node):
                 if timestamp_leader > self.leaders_last_ts[name_leader]:
                     self.response_data_delta[name_leader][instrument.timestamp] = {self.name: delta_follower,
                                                                                 name_leader: delta_leader}
+                    self._trim_responses(self.response_data_delta[name_leader], instrument.timestamp)
                     self.leaders_last_ts[name_leader] = timestamp_leader
                 #    self.weight_metrics.update(name_leader, delta_leader, delta_follower)
             
         self.last_delta = delta_follower
         self.last_timestamp = instrument.timestamp
+
+    def _trim_responses(self, responses, timestamp):
+        timestamp_min = timestamp - self.retention
+        while responses:
+            timestamp_oldest = next(iter(responses))
+            if timestamp_oldest >= timestamp_min:
+                break
+            del responses[timestamp_oldest]
@@ -6,6 +6,11 @@ def get_config():
                          "adjustment" : 10}
     
     rounding_configs = {"weight" : 5}
+
+    history_configs = {"retention" : 300}
+    
+    weight_configs = {"n_max" : 20,
+                      "session_window" : 16384}
     
     eurex_roles_configs = {"leader_instruments" : ["US500"],
                             "follower_instruments" :["DE40", "EU50"]
@@ -20,13 +25,19 @@ def get_config():
 
     eurex_configs = {"tolerance" : tolerance_configs,
                "rounding" : rounding_configs,
+               "history" : history_configs,
+               "weights" : weight_configs,
                "instrument_roles_configs" : eurex_roles_configs}
     
     swiss_configs = {"tolerance" : tolerance_configs,
                "rounding" : rounding_configs,
+               "history" : history_configs,
+               "weights" : weight_configs,
                "instrument_roles_configs" : swiss_roles_configs}
     ftse_configs = {"tolerance" : tolerance_configs,
                "rounding" : rounding_configs,
+               "history" : history_configs,
+               "weights" : weight_configs,
                "instrument_roles_configs" : ftse_roles_configs}
 
 
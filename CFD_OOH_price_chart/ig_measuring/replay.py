@@ -0,0 +1,245 @@
+"""
+Headless replay of stored ticks through the ig_measuring Follower/Leader/WeightMetrics
+classes, for tuning ig_measuring/config.py offline instead of on a live chart.
+
+Each day is split into a calibration window, used to build the followers exactly as
+create_weight_metrics does at startup, and the rest of the day, which is fed tick by
+tick through update_from_instrument in timestamp order. Days run in parallel processes.
+
+    python -m ig_measuring.replay --test --dt 0.25 --dw 0.15 --n-max 30
+"""
+from __future__ import annotations
+from typing import List, Dict, Tuple, Any
+
+import argparse
+import copy
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+from historical import builders as builders_historical
+from historical import utils as utils_historical
+from instruments.info import info_utils as utils_info
+from . import builders as builders_ig_measuring
+from . import config as config_ig_measuring
+
+CALIBRATION_SECONDS = 3600
+
+
+class _Tick:
+    """Stand-in for the PriceInstrument attributes read by Leader/Follower.update_from_instrument."""
+    __slots__ = ("timestamp", "bid", "ask")
+
+    def __init__(self):
+        self.timestamp = self.bid = self.ask = np.nan
+
+
+def apply_overrides(configs: Dict[str, Dict[str, Any]],
+                    dt: float | None=None,
+                    dw: float | None=None,
+                    n_max: int | None=None,
+                    ) -> Dict[str, Dict[str, Any]]:
+    configs = copy.deepcopy(configs)
+    for config in configs.values():
+        if not dt is None:
+            config["tolerance"]["dt"] = dt
+        if not dw is None:
+            config["tolerance"]["dw"] = dw
+        if not n_max is None:
+            config["weights"]["n_max"] = n_max
+    return configs
+
+def _group_names(config: Dict[str, Any]) -> List[str]:
+    roles = config["instrument_roles_configs"]
+    return [*roles["leader_instruments"], *roles["follower_instruments"]]
+
+def get_replay_days(configs: Dict[str, Dict[str, Any]],
+                    capital_ig_map: Dict[str, str],
+                    test_flag: bool,
+                    ) -> List[str]:
+    """Days on which every instrument of at least one group has ticks."""
+    index = builders_historical.get_epic_file_index(test_flag)
+    days_with_data = {}
+    for name in {name for config in configs.values() for name in _group_names(config)}:
+        days_with_data[name] = {day_file.day for day_file in index.files_for(capital_ig_map[name]) if day_file.rows > 0}
+    days = set()
+    for config in configs.values():
+        days |= set.intersection(*(days_with_data[name] for name in _group_names(config)))
+    return sorted(days)
+
+def _load_day(store, day: str, name_ig: str) -> Dict[str, np.ndarray] | None:
+    if not name_ig in store.manifest.get(day, {}):
+        return None
+    columns = utils_historical.clean_columns(store.load_day(day, name_ig), False)
+    if columns["timestamp"].size == 0:
+        return None
+    return columns
+
+def _split_calibration(day_data: Dict[str, Dict[str, np.ndarray]],
+                       t_split: float,
+                       ) -> Tuple[Dict[str, Tuple[np.ndarray, np.ndarray]], Dict[str, Tuple[np.ndarray, ...]]]:
+    calibration_data, replay_data = {}, {}
+    for name, columns in day_data.items():
+        idx_split = int(np.searchsorted(columns["timestamp"], t_split, side="left"))
+        mid = 0.5 * (columns["bid"] + columns["ask"])
+        calibration_data[name] = (columns["timestamp"][:idx_split], mid[:idx_split])
+        replay_data[name] = tuple(columns[key][idx_split:] for key in ("timestamp", "bid", "ask"))
+    return calibration_data, replay_data
+
+def _merged_order(replay_data: Dict[str, Tuple[np.ndarray, ...]],
+                  names: List[str],
+                  ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Positions in the concatenated ticks of names, in timestamp order (ties in names order)."""
+    timestamps = np.concatenate([replay_data[name][0] for name in names])
+    name_ids = np.concatenate([np.full(replay_data[name][0].size, idx_name) for idx_name, name in enumerate(names)])
+    order = np.argsort(timestamps, kind="stable")
+    return order, name_ids[order], timestamps[order]
+
+def replay_group(day: str,
+                 group: str,
+                 config: Dict[str, Any],
+                 day_data: Dict[str, Dict[str, np.ndarray]],
+                 calibration_seconds: float=CALIBRATION_SECONDS,
+                 ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Calibrates every follower of the group on the first calibration_seconds of the day
+    and replays the remaining ticks. Returns one summary row per follower/leader pair
+    and one row per weight change signalled during the replay.
+    """
+    leader_names = config["instrument_roles_configs"]["leader_instruments"]
+    names = _group_names(config)
+    t_split = min(day_data[name]["timestamp"][0] for name in names) + calibration_seconds
+    calibration_data, replay_data = _split_calibration(day_data, t_split)
+
+    followers = {}
+    leader_objects = {name : [] for name in leader_names}
+    weight_change_rows = []
+    for name_follower in config["instrument_roles_configs"]["follower_instruments"]:
+        if any(calibration_data[name][0].size == 0 for name in [name_follower, *leader_names]):
+            continue
+        follower, leaders = builders_ig_measuring.create_follower(name_follower, leader_names, calibration_data, config)
+        if not leaders:
+            continue
+        followers[name_follower] = follower
+        for name_leader, leader in leaders.items():
+            leader_objects[name_leader].append(leader)
+
+            def _on_weight_change(name_leader, timestamp_leader, follower=follower):
+                weight_metrics = follower.weight_metrics
+                weight_change_rows.append({"day" : day,
+                                           "group" : group,
+                                           "follower" : follower.name,
+                                           "leader" : name_leader,
+                                           "timestamp" : timestamp_leader,
+                                           "median" : weight_metrics.metrics[name_leader],
+                                           "window_median" : weight_metrics.sliding_median_container[name_leader].median(),
+                                           })
+            follower.weight_metrics.add_weight_changed_callback(name_leader, _on_weight_change)
+
+    updates = [[leader.update_from_instrument for leader in leader_objects.get(name, [])] for name in names]
+    for idx_name, name in enumerate(names):
+        if name in followers:
+            updates[idx_name].append(followers[name].update_from_instrument)
+
+    order, name_ids, timestamps = _merged_order(replay_data, names)
+    bids = np.concatenate([replay_data[name][1] for name in names])[order]
+    asks = np.concatenate([replay_data[name][2] for name in names])[order]
+    tick = _Tick()
+    for name_id, timestamp, bid, ask in zip(name_ids.tolist(), timestamps.tolist(), bids.tolist(), asks.tolist()):
+        tick.timestamp, tick.bid, tick.ask = timestamp, bid, ask
+        for update in updates[name_id]:
+            update(tick)
+
+    summary_rows = []
+    for name_follower, follower in followers.items():
+        weight_metrics = follower.weight_metrics
+        for name_leader in follower.leader_callbacks:
+            summary_rows.append({"day" : day,
+                                 "group" : group,
+                                 "follower" : name_follower,
+                                 "leader" : name_leader,
+                                 "theo_weight" : weight_metrics.theo_weights[name_leader]["main"],
+                                 "median" : weight_metrics.metrics[name_leader],
+                                 "window_median" : weight_metrics.sliding_median_container[name_leader].median(),
+                                 "n_weight_changes" : sum(row["follower"] == name_follower and row["leader"] == name_leader for row in weight_change_rows),
+                                 "n_ticks" : int(replay_data[name_follower][0].size),
+                                 })
+    return summary_rows, weight_change_rows
+
+def replay_day(day: str,
+               configs: Dict[str, Dict[str, Any]],
+               capital_ig_map: Dict[str, str],
+               test_flag: bool,
+               calibration_seconds: float=CALIBRATION_SECONDS,
+               ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    store = builders_historical.get_tick_store(test_flag)
+    summary_rows, weight_change_rows = [], []
+    for group, config in configs.items():
+        day_data = {name : _load_day(store, day, capital_ig_map[name]) for name in _group_names(config)}
+        if any(columns is None for columns in day_data.values()):
+            continue
+        group_summary, group_weight_changes = replay_group(day, group, config, day_data, calibration_seconds)
+        summary_rows += group_summary
+        weight_change_rows += group_weight_changes
+    return summary_rows, weight_change_rows
+
+def replay_days(days: List[str] | None=None,
+                configs: Dict[str, Dict[str, Any]] | None=None,
+                test_flag: bool=False,
+                calibration_seconds: float=CALIBRATION_SECONDS,
+                max_workers: int | None=None,
+                ) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Replays days (all days with data by default) with configs (config.get_config() by
+    default) on a process pool. Returns the per-pair summary and the weight changes.
+    """
+    if configs is None:
+        configs = config_ig_measuring.get_config()
+    capital_ig_map, _ = utils_info.create_capital_ig_maps()
+    if days is None:
+        days = get_replay_days(configs, capital_ig_map, test_flag)
+    else:
+        builders_historical.get_epic_file_index(test_flag)
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    max_workers = max(1, min(max_workers, len(days)))
+
+    summary_rows, weight_change_rows = [], []
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(replay_day, day, configs, capital_ig_map, test_flag, calibration_seconds) for day in days]
+        for future in futures:
+            day_summary, day_weight_changes = future.result()
+            summary_rows += day_summary
+            weight_change_rows += day_weight_changes
+    summary = pd.DataFrame(summary_rows, columns=["day", "group", "follower", "leader", "theo_weight",
+                                                  "median", "window_median", "n_weight_changes", "n_ticks"])
+    weight_changes = pd.DataFrame(weight_change_rows, columns=["day", "group", "follower", "leader",
+                                                               "timestamp", "median", "window_median"])
+    return summary, weight_changes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay stored ticks through the ig_measuring classes.")
+    parser.add_argument("--test", action="store_true", help="use the test data directory")
+    parser.add_argument("--days", nargs="*", default=None)
+    parser.add_argument("--dt", type=float, default=None)
+    parser.add_argument("--dw", type=float, default=None)
+    parser.add_argument("--n-max", type=int, default=None)
+    parser.add_argument("--calibration", type=float, default=CALIBRATION_SECONDS, help="seconds of each day used for calibration")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--out", default=None, help="prefix for <out>_summary.csv and <out>_weight_changes.csv")
+    args = parser.parse_args()
+
+    configs = apply_overrides(config_ig_measuring.get_config(), args.dt, args.dw, args.n_max)
+    t_start = time.perf_counter()
+    summary, weight_changes = replay_days(args.days, configs, args.test, args.calibration, args.workers)
+    print(summary.to_string(index=False))
+    print(f"{len(weight_changes)} weight changes, replayed in {time.perf_counter() - t_start:.2f}s")
+    if not args.out is None:
+        summary.to_csv(f"{args.out}_summary.csv", index=False)
+        weight_changes.to_csv(f"{args.out}_weight_changes.csv", index=False)
+
+if __name__ == "__main__":
+    main()
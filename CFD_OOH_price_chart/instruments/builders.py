@@ -119,13 +119,15 @@ def create_instrument_objects_objects(instrument_container: List[str],
         timeseries = timeseries_parent_container[name]
         specs = instrument_specs[name]
         instrument_info = instrument_info_container[name]
+        timestamp, bid, ask = timeseries.get_last_values()
         base_instrument_object = classes_instruments.PriceInstrument(specs=specs,
                                                                     info=instrument_info,
                                                                     metric_type="price",
-                                                                    timestamp=timeseries.timestamps[-1],
-                                                                    bid=timeseries.bid[-1],
-                                                                    ask=timeseries.ask[-1],
+                                                                    timestamp=timestamp,
+                                                                    bid=bid,
+                                                                    ask=ask,
                                                                     display_name=specs.name)
+        base_instrument_object.add_update_callback(timeseries.update, timeseries.update_batch)
         base_objects[name] = base_instrument_object
     return base_objects
 
@@ -73,13 +73,16 @@ class BaseInstrument(_AbstractInstrument):
     timestamp: float
     display_name: str = field(default_factory=lambda: None)
     update_callbacks: List[Callable] = field(default_factory= lambda: [])    
+    batch_update_callbacks: Dict[Callable, Callable] = field(default_factory=dict)
 
     @abstractmethod
     def update(self, **kwargs):
         ...
 
-    def add_update_callback(self, callback):
+    def add_update_callback(self, callback, batch_callback=None):
         self.update_callbacks.append(callback)
+        if not batch_callback is None:
+            self.batch_update_callbacks[callback] = batch_callback
         #self.update_callbacks.append(WeakMethod(callback))
 
     def remove_update_callback(self, callback):
@@ -151,6 +154,30 @@ class PriceInstrument(BaseInstrument):
         if not ask is None:
             self.ask = ask
         self.update_cleanup()
+
+    def get_tick_callbacks(self) -> List[Callable]:
+        return [callback for callback in self.update_callbacks if not callback in self.batch_update_callbacks]
+
+    def update_tick(self, timestamp, bid, ask, tick_callbacks):
+        self.timestamp, self.bid, self.ask = timestamp, bid, ask
+        for callback in tick_callbacks:
+            callback(self)
+
+    def update_batch(self, timestamps, bids, asks, replay_ticks=True):
+        """
+        Applies a batch of ticks. Callbacks registered with a batch_callback get the
+        whole batch in one call; the others are replayed tick by tick as with update,
+        unless the caller has already replayed them in arrival order across
+        instruments (replay_ticks=False).
+        """
+        tick_callbacks = self.get_tick_callbacks() if replay_ticks else []
+        if tick_callbacks:
+            for timestamp, bid, ask in zip(timestamps.tolist(), bids.tolist(), asks.tolist()):
+                self.update_tick(timestamp, bid, ask, tick_callbacks)
+        self.timestamp, self.bid, self.ask = float(timestamps[-1]), float(bids[-1]), float(asks[-1])
+        for callback in self.update_callbacks:
+            if callback in self.batch_update_callbacks:
+                self.batch_update_callbacks[callback](self, timestamps, bids, asks)
         
     def update_cleanup(self) -> None:
         for callback in self.update_callbacks:
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from streaming import synthetic_client
+from streaming import replay_client
 from timeseries import builders as builders_timeseries
 from historical import builders as builders_historical
 from instruments import builders as builders_instruments
@@ -10,7 +11,7 @@ from subplot_structure import builders as builders_subplot_structure
 from custom_qt_classes import builders as builders_custom_qt_classes
 import streaming.ig_client as ig_client
 import application
-from queue import Queue
+from streaming.tick_queue import TickQueue
 import workers
 import sys
 from ig_measuring import builders as builders_ig_measuring
@@ -27,6 +28,7 @@ def main():
     
     test_flag=True
     ig_measure=True  # IG analytics
+    replay_flag=False  # test data pushed straight onto the queue, no websocket (profiling)
     
     if test_flag:
         classes_time_helpers.initialize_time_helpers(test_flag)        
@@ -43,10 +45,14 @@ def main():
     instrument_specs = builders_instruments.create_instrument_specs_container(instrument_container, exchange_container)
     instrument_info_container = builders_instruments.create_instrument_info_container(instrument_specs)
     
-    df_dict = builders_historical.get_historical_data(instrument_container,
-                                                    capital_ig_map,
-                                                    test_flag)
-    timeseries_parent_container = builders_timeseries.create_parent_timeseries_container(df_dict)
+    history_start_time = builders_subplot_structure.get_history_start_time(plot_configurations,
+                                                                           instrument_specs,
+                                                                           subplot_structure_config.get_history_params()["margin"])
+    historical_data = builders_historical.get_historical_data(instrument_container,
+                                                              capital_ig_map,
+                                                              test_flag,
+                                                              start_time=history_start_time)
+    timeseries_parent_container = builders_timeseries.create_parent_timeseries_container(historical_data)
     instrument_container = builders_instruments.create_instrument_objects_objects(instrument_container,
                                                                                   timeseries_parent_container,
                                                                                   instrument_specs,
@@ -63,8 +69,12 @@ def main():
         builders_ig_measuring.create_weight_metrics(subplot_structure_container,
                                                     ig_measuring_configs)
         
-    queue = Queue()
-    if test_flag:
+    queue = TickQueue()
+    if test_flag and replay_flag:
+        streaming_client = replay_client.create_streaming_application(instrument_container,
+                                                                      capital_ig_map,
+                                                                      queue)
+    elif test_flag:
         streaming_client = synthetic_client.create_streaming_application(instrument_container,
                                                                          capital_ig_map,
                                                                          queue)
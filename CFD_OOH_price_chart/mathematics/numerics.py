@@ -1,5 +1,5 @@
 from __future__ import annotations
-from typing import List, Dict, Union, Tuple, Callable, TYPE_CHECKING, ClassVar, Any
+from typing import List, Dict, Union, Tuple, Callable, TYPE_CHECKING, Any
 if TYPE_CHECKING:
     from instruments.classes import PriceInstrument, SyntheticInstrument, PriceInstrument
     
@@ -9,6 +9,7 @@ from dataclasses import dataclass, field
 import numpy as np
 import heapq
 import ast, math
+from collections import Counter, deque
 from custom_numpy import BufferArray
 
 class DynamicMedian:
@@ -45,6 +46,98 @@ class DynamicMedian:
         return self.values
 
 
+class SlidingMedian:
+    """
+    Median of the last window values: two heaps with lazy deletion, O(log window) per
+    insert/evict. Evicted values that are not at the top of a heap are only marked, and
+    the heaps are rebuilt from the window once they hold twice its size, so memory stays
+    O(window). Matches np.median of the same window, including returning nan while the
+    window holds a nan (nans are counted, not put in the heaps).
+    """
+    def __init__(self, window: int, values: Union[List[float], None]=None):
+        self.window = window
+        self.values = deque()
+        self.low = []
+        self.high = []
+        self._n_low = 0
+        self._n_high = 0
+        self._n_nan = 0
+        self._delayed = Counter()
+        if not values is None:
+            for value in values:
+                self.insert(value)
+
+    def __len__(self):
+        return len(self.values)
+
+    def insert(self, value: float):
+        self.values.append(value)
+        if value != value:
+            self._n_nan += 1
+        elif not self.low or value <= -self.low[0]:
+            heapq.heappush(self.low, -value)
+            self._n_low += 1
+        else:
+            heapq.heappush(self.high, value)
+            self._n_high += 1
+        if len(self.values) > self.window:
+            self._evict(self.values.popleft())
+        self._rebalance()
+        if len(self.low) + len(self.high) > 2 * self.window + 8:
+            self._rebuild()
+
+    def _evict(self, value: float):
+        if value != value:
+            self._n_nan -= 1
+            return
+        self._delayed[value] += 1
+        if value <= -self.low[0]:
+            self._n_low -= 1
+            if value == -self.low[0]:
+                self._prune(self.low, -1)
+        else:
+            self._n_high -= 1
+            if value == self.high[0]:
+                self._prune(self.high, 1)
+
+    def _prune(self, heap: List[float], sign: int):
+        while heap and self._delayed[sign * heap[0]] > 0:
+            value = sign * heapq.heappop(heap)
+            self._delayed[value] -= 1
+            if self._delayed[value] == 0:
+                del self._delayed[value]
+
+    def _rebalance(self):
+        if self._n_low > self._n_high + 1:
+            heapq.heappush(self.high, -heapq.heappop(self.low))
+            self._n_low -= 1
+            self._n_high += 1
+            self._prune(self.low, -1)
+        elif self._n_high > self._n_low:
+            heapq.heappush(self.low, -heapq.heappop(self.high))
+            self._n_high -= 1
+            self._n_low += 1
+            self._prune(self.high, 1)
+
+    def _rebuild(self):
+        values = sorted(value for value in self.values if value == value)
+        self._n_low = (len(values) + 1) // 2
+        self._n_high = len(values) - self._n_low
+        self.low = [-value for value in reversed(values[:self._n_low])]
+        self.high = values[self._n_low:]
+        self._delayed.clear()
+
+    def median(self) -> float:
+        if self._n_nan > 0 or self._n_low == 0:
+            return np.nan
+        if self._n_low > self._n_high:
+            return -self.low[0]
+        return (-self.low[0] + self.high[0]) / 2
+
+    def get_values(self) -> List[float]:
+        return list(self.values)
+
+
 def spread(bid, ask):
     return ask - bid
 
@@ -235,41 +328,270 @@ _FUNC_SCALAR = {"log": math.log,
                 "exp": math.exp,
                 "sqrt": math.sqrt}
 
+# Scalar closure makers per operator for (expr, expr), (expr, constant), (constant, expr)
+# and (name, name) operands, with the arithmetic inlined rather than called.
+_SCALAR_BINARY_OPS = {ast.Add: (lambda l, r: lambda d: l(d) + r(d), lambda l, c: lambda d: l(d) + c,
+                                lambda c, r: lambda d: c + r(d), lambda a, b: lambda d: d[a] + d[b]),
+                      ast.Sub: (lambda l, r: lambda d: l(d) - r(d), lambda l, c: lambda d: l(d) - c,
+                                lambda c, r: lambda d: c - r(d), lambda a, b: lambda d: d[a] - d[b]),
+                      ast.Mult: (lambda l, r: lambda d: l(d) * r(d), lambda l, c: lambda d: l(d) * c,
+                                 lambda c, r: lambda d: c * r(d), lambda a, b: lambda d: d[a] * d[b]),
+                      ast.Div: (lambda l, r: lambda d: l(d) / r(d), lambda l, c: lambda d: l(d) / c,
+                                lambda c, r: lambda d: c / r(d), lambda a, b: lambda d: d[a] / d[b]),
+                      ast.Pow: (lambda l, r: lambda d: l(d) ** r(d), lambda l, c: lambda d: l(d) ** c,
+                                lambda c, r: lambda d: c ** r(d), lambda a, b: lambda d: d[a] ** d[b]),
+                      }
+
+_SCALAR_UNARY_OPS = {ast.USub: lambda x: lambda d: -x(d),
+                     ast.UAdd: lambda x: lambda d: +x(d),
+                     }
+
+_BASKET_OPS = {ast.Add: "sum",
+               ast.Mult: "product",
+               }
+
+_ARRAY_BINARY_OPS = {ast.Add: np.add,
+                     ast.Sub: np.subtract,
+                     ast.Mult: np.multiply,
+                     ast.Div: np.true_divide,
+                     ast.Pow: np.power,
+                     }
+
+_ARRAY_UNARY_OPS = {ast.USub: np.negative,
+                    ast.UAdd: np.positive,
+                    }
+
+
+class ExpressionGraph:
+    """
+    Arithmetic expression (names, numbers, + - * / **, unary +/- and the _FUNC_SCALAR /
+    _FUNC_ARRAY functions) parsed once into an op graph.
+
+    The scalar path is a tree of closures reading the names straight from the data
+    dict. The array path runs the ops in post-order over a slot table (names,
+    constants, temporaries); each op writes into a preallocated temporary, reusing the
+    temporary of its own operand when it has one, so an evaluation allocates at most
+    its result (nothing when out is given).
+    """
+    __slots__ = ("expr", "names", "basket_mode", "_scalar", "_instructions", "_constants", "_n_temps", "_result_slot", "_temps", "_temps_shape")
+
+    def __init__(self, expr: str, extra: Dict[str, Callable] | None=None):
+        self.expr = expr
+        self.names: List[str] = []
+        self._constants: List[float] = []
+        self._instructions: List[Tuple[Callable, Tuple[int, ...], int]] = []
+        self._n_temps = 0
+        self._temps: List[np.ndarray] = []
+        self._temps_shape = None
+
+        functions = {name : (_FUNC_SCALAR.get(name, function), function) for name, function in _FUNC_ARRAY.items()}
+        for name, function in (extra or {}).items():
+            functions[name] = (function, function)
+
+        tree = ast.parse(expr, mode="eval").body
+        self._collect_names(tree)
+        self.basket_mode = self._find_basket_mode(tree)
+        self._scalar = self._build_scalar(tree, functions)
+        self._result_slot = self._build_array(tree, functions)
+
+    def _collect_names(self, node: ast.AST) -> None:
+        if isinstance(node, ast.Name):
+            if not node.id in self.names:
+                self.names.append(node.id)
+        elif isinstance(node, ast.BinOp):
+            self._collect_names(node.left)
+            self._collect_names(node.right)
+        elif isinstance(node, ast.UnaryOp):
+            self._collect_names(node.operand)
+        elif isinstance(node, ast.Call):
+            for arg in node.args:
+                self._collect_names(arg)
+
+    def _find_basket_mode(self, node: ast.AST) -> str | None:
+        """
+        "sum" / "product" if the expression is distinct names joined only by + / *
+        (e.g. "HK50+CN50+J225"), otherwise None.
+        """
+        if not isinstance(node, ast.BinOp) or not type(node.op) in _BASKET_OPS:
+            return None
+        op = type(node.op)
+        operands = []
+        while isinstance(node, ast.BinOp) and type(node.op) == op:
+            operands.append(node.right)
+            node = node.left
+        operands.append(node)
+        if all(isinstance(operand, ast.Name) for operand in operands) and len(operands) == len(self.names):
+            return _BASKET_OPS[op]
+        return None
+
+    def _build_scalar(self,
+                      node: ast.AST,
+                      functions: Dict[str, Tuple[Callable, Callable]],
+                      ) -> Callable[[Dict[str, float]], float]:
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
+            value = node.value
+            return lambda d: value
+        if isinstance(node, ast.Name):
+            name = node.id
+            return lambda d: d[name]
+        if isinstance(node, ast.BinOp) and type(node.op) in _SCALAR_BINARY_OPS:
+            make_expr_expr, make_expr_const, make_const_expr, make_name_name = _SCALAR_BINARY_OPS[type(node.op)]
+            if isinstance(node.left, ast.Name) and isinstance(node.right, ast.Name):
+                return make_name_name(node.left.id, node.right.id)
+            if isinstance(node.right, ast.Constant):
+                return make_expr_const(self._build_scalar(node.left, functions), node.right.value)
+            if isinstance(node.left, ast.Constant):
+                return make_const_expr(node.left.value, self._build_scalar(node.right, functions))
+            return make_expr_expr(self._build_scalar(node.left, functions), self._build_scalar(node.right, functions))
+        if isinstance(node, ast.UnaryOp) and type(node.op) in _SCALAR_UNARY_OPS:
+            return _SCALAR_UNARY_OPS[type(node.op)](self._build_scalar(node.operand, functions))
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in functions and not node.keywords:
+            function = functions[node.func.id][0]
+            args = [self._build_scalar(arg, functions) for arg in node.args]
+            if len(args) == 1:
+                arg = args[0]
+                return lambda d: function(arg(d))
+            return lambda d: function(*[arg(d) for arg in args])
+        raise ValueError(f"Unsupported element {ast.dump(node)} in expression {self.expr!r}")
+
+    def _build_array(self,
+                     node: ast.AST,
+                     functions: Dict[str, Tuple[Callable, Callable]],
+                     ) -> int:
+        """Appends the ops of node to the instruction list and returns its slot."""
+        if isinstance(node, ast.Name):
+            return self.names.index(node.id)
+        if isinstance(node, ast.Constant):
+            self._constants.append(node.value)
+            return -len(self._constants)
+        if isinstance(node, ast.BinOp):
+            function = _ARRAY_BINARY_OPS[type(node.op)]
+            args = (self._build_array(node.left, functions), self._build_array(node.right, functions))
+        elif isinstance(node, ast.UnaryOp):
+            function = _ARRAY_UNARY_OPS[type(node.op)]
+            args = (self._build_array(node.operand, functions),)
+        else:
+            function = functions[node.func.id][1]
+            args = tuple(self._build_array(arg, functions) for arg in node.args)
+
+        temp_args = [arg for arg in args if arg >= len(self.names)]
+        if temp_args and isinstance(function, np.ufunc):
+            slot = temp_args[0]
+        else:
+            self._n_temps += 1
+            slot = len(self.names) + self._n_temps - 1
+        self._instructions.append((function, args, slot))
+        return slot
+
+    def evaluate_scalar(self, data: Dict[str, float]) -> float:
+        return self._scalar(data)
+
+    def evaluate_array(self,
+                       data: Dict[str, np.ndarray],
+                       out: np.ndarray | None=None,
+                       ) -> np.ndarray:
+        inputs = [data[name] for name in self.names]
+        if not self._instructions:
+            result = inputs[0] if self._result_slot >= 0 else self._constants[-1 - self._result_slot]
+            if out is None:
+                return result
+            out[...] = result
+            return out
+
+        shape = np.broadcast_shapes(*[np.shape(value) for value in inputs])
+        if shape != self._temps_shape:
+            self._temps = [np.empty(shape, dtype=np.float64) for _ in range(self._n_temps)]
+            self._temps_shape = shape
+        slots = inputs + self._temps
+        slots[self._result_slot] = np.empty(shape, dtype=np.float64) if out is None else out
+
+        for function, args, slot in self._instructions:
+            values = [slots[arg] if arg >= 0 else self._constants[-1 - arg] for arg in args]
+            if isinstance(function, np.ufunc):
+                function(*values, out=slots[slot])
+            else:
+                slots[slot][...] = function(*values)
+        return slots[self._result_slot]
+
+
 def _compiler_array(expr, extra=None):
-    env = {**_FUNC_ARRAY, **(extra or {})}
-    code = compile(ast.parse(expr, mode="eval"), "<expr>", "eval")
-    return lambda d: eval(code, {"__builtins__": None, **env}, d)
+    return ExpressionGraph(expr, extra).evaluate_array
 
 def _compiler_scalar(expr, extra=None):
-    env = {**_FUNC_SCALAR, **(extra or {})}
-    code = compile(ast.parse(expr, mode="eval"), "<expr>", "eval")
-    return lambda d: eval(code, {"__builtins__": None, **env}, d)
+    return ExpressionGraph(expr, extra).evaluate_scalar
+
 
 
+_BASKET_RECOMPUTE_EVERY = 1024
+
+def _is_finite(value) -> bool:
+    return isinstance(value, (int, float)) and math.isfinite(value)
+
 
 @dataclass(slots=True)
 class MetricEngine:
+    """
+    Evaluates an expression over named values. Baskets (distinct names joined only by
+    + or *, which includes every mode="sum"/"product" engine) keep a running aggregate
+    that each member update adjusts in O(1) from its delta; the aggregate is fully
+    recomputed every _BASKET_RECOMPUTE_EVERY updates to bound rounding drift, and
+    whenever a delta cannot be applied (non-finite values, a zero factor).
+    """
     data: Union[Dict[str, float], List[str]] = field(default_factory=lambda: None)
     op_expr: str | None = field(default_factory=lambda: None)
     mode: str | None = field(default_factory=lambda: None)
     compiler_scalar: Callable = field(default_factory=lambda: None)
     compiler_array: Callable = field(default_factory=lambda: None)
     static_param: None = field(default_factory=lambda: None)
+    basket_mode: str | None = field(default_factory=lambda: None)
+    _basket_members: frozenset = field(default_factory=frozenset)
+    _aggregate: float | None = field(default_factory=lambda: None)
+    _n_incremental: int = field(default_factory=lambda: 0)
 
     def __post_init__(self):
         if self.op_expr is None:
             if self.mode in _OPERATOR:
                 self.op_expr = self.create_expression(self.data, _OPERATOR[self.mode])
                 
-        self.compiler_scalar = _compiler_scalar(self.op_expr)
-        self.compiler_array = _compiler_array(self.op_expr)
+        expression_graph = ExpressionGraph(self.op_expr)
+        self.compiler_scalar = expression_graph.evaluate_scalar
+        self.compiler_array = expression_graph.evaluate_array
+        self.basket_mode = expression_graph.basket_mode
+        self._basket_members = frozenset(expression_graph.names)
         
     def __call__(self, update_dict: Dict[str, float]) -> float|BufferArray|np.ndarray:
-        self.data.update(update_dict)
-        return self.compiler_scalar(self.data)
+        if self.basket_mode is None:
+            self.data.update(update_dict)
+            return self.compiler_scalar(self.data)
+        for name, value in update_dict.items():
+            self.update_data_dict(value, name)
+        return self.evaluate_scalar()
+
+    def evaluate_scalar(self) -> float:
+        if self.basket_mode is None:
+            return self.compiler_scalar(self.data)
+        if self._aggregate is None:
+            self._recompute_aggregate()
+        return self._aggregate
+
+    def _recompute_aggregate(self) -> None:
+        self._aggregate = self.compiler_scalar(self.data)
+        self._n_incremental = 0
+
+    def _update_aggregate(self, old_value: float, value: float) -> None:
+        self._n_incremental += 1
+        if (self._n_incremental >= _BASKET_RECOMPUTE_EVERY
+            or not _is_finite(old_value) or not _is_finite(value) or not _is_finite(self._aggregate)):
+            self._aggregate = None
+        elif self.basket_mode == "sum":
+            self._aggregate += value - old_value
+        elif old_value == 0:
+            self._aggregate = None
+        else:
+            self._aggregate *= value / old_value
     
     def display_function(self, *args):
-        return self.compiler_scalar(self.data)
+        return self.evaluate_scalar()
     
     def convert_to_display(self, _, values):
         return values
@@ -284,10 +606,13 @@ class MetricEngine:
                          value: float,
                          name: str
                          ) -> None:
+        old_value = self.data.get(name, None)
         self.data[name]=value
+        if not self.basket_mode is None and not self._aggregate is None and name in self._basket_members:
+            self._update_aggregate(old_value, value)
     
-    def evaluate_array(self, values_dict):
-        return self.compiler_array(values_dict)
+    def evaluate_array(self, values_dict, out=None):
+        return self.compiler_array(values_dict, out)
     
     @classmethod
     def from_child_instrument_list(cls,
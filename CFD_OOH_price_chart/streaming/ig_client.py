@@ -75,7 +75,8 @@ def create_streaming_application(instrument_list: List[str],
     market_subscription = client.Subscription(mode=mode, items=items, fields=fields)
 
 
-    listener = market_listener.MarketListener(queue_object)
+    instrument_ids = utils_streaming.create_instrument_ids(instrument_list)
+    listener = market_listener.MarketListener(queue_object, instrument_ids)
     market_subscription.addListener(listener)
     ig_stream_service.subscribe(market_subscription)
     return ig_stream_service
@@ -2,20 +2,35 @@ from lightstreamer import client
 from typing import Union, Dict, TYPE_CHECKING, List
 from queue import Queue
 from instruments.info import info_utils
+from streaming import utils as utils_streaming
 
 
 
 class MarketListener(client.SubscriptionListener):
-    def __init__(self, q: Queue):
+    def __init__(self, q: Queue, instrument_ids: Dict[str, int]):
         super().__init__()
         self.capital_to_ig, self.ig_to_capital = info_utils.create_capital_ig_maps()
         self.temp_dict = {}
         self.q = q
+        self.instrument_ids = instrument_ids
+        self.item_ids = {utils_streaming.get_tick_item(self.capital_to_ig[name]) : instrument_id
+                         for name, instrument_id in instrument_ids.items()}
+        self.instrument_ids_by_tick_id = []
+
+    def set_tick_ids(self, ig_names: List[str | None]):
+        """Instrument ids of the binary synthetic feed are positions in ig_names; None for names not subscribed to."""
+        self.instrument_ids_by_tick_id = [None if name is None else self.instrument_ids[self.ig_to_capital[name]] for name in ig_names]
+
+    def on_ticks(self, message: bytes):
+        """Binary message of the synthetic feed: the fields are already floats, only UTM needs ms -> s."""
+        instrument_ids, put = self.instrument_ids_by_tick_id, self.q.put
+        for tick_id, timestamp, bid_price, ask_price in utils_streaming.iter_ticks(message):
+            instrument_id = instrument_ids[tick_id]
+            if not instrument_id is None:
+                put((instrument_id, timestamp / 1000, bid_price, ask_price))
 
     def onItemUpdate(self, update: client.ItemUpdate):
-        epic_name =  update.getItemName()
-        
-        _, instrument_id, _ = epic_name.split(':')
+        instrument_id = self.item_ids[update.getItemName()]
         
         bid_price = update.getValue(1)
         ask_price = update.getValue(2)
@@ -27,8 +42,6 @@ class MarketListener(client.SubscriptionListener):
             timestamp = float(timestamp)
             timestamp = timestamp / 1000
 
-            capital_epic = self.ig_to_capital[instrument_id]
-                
-            self.q.put((capital_epic, timestamp, bid_price, ask_price))
+            self.q.put((instrument_id, timestamp, bid_price, ask_price))
             
  
\ No newline at end of file
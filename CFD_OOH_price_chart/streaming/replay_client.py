@@ -0,0 +1,100 @@
+from __future__ import annotations
+from typing import Dict, TYPE_CHECKING, List
+if TYPE_CHECKING:
+    from queue import Queue
+
+import threading
+import time
+import numpy as np
+from streaming import utils as utils_streaming
+
+
+class ReplayService:
+    """
+    Streaming client that replays the stored test ticks straight onto the queue from a
+    thread, with no server, socket or serialisation in between, so that profiling
+    measures only what the chart itself can absorb.
+
+    The ticks of all instruments go out in one time-ordered stream on the same
+    absolute-deadline clock as the synthetic feed (see utils_streaming.get_replay_batches).
+    speed=None pushes them as fast as the application drains the queue, keeping at most
+    max_queue_depth ticks waiting. Ticks of ig_names[i] are queued with instrument_ids[i].
+    """
+    def __init__(self,
+                 instrument_ids: List[int],
+                 ig_names: List[str],
+                 queue_object: Queue,
+                 speed: float | None=1,
+                 batch_window_ms: float=1,
+                 max_batch_ticks: int=4096,
+                 max_queue_depth: int=65536,
+                 ):
+        self.instrument_ids = instrument_ids
+        self.ig_names = ig_names
+        self.queue = queue_object
+        self.speed = speed
+        self.batch_window_ms = batch_window_ms
+        self.max_batch_ticks = max_batch_ticks
+        self.max_queue_depth = max_queue_depth
+        self.n_ticks = 0
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def create_session(self):
+        pass
+
+    def subscribe(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def disconnect(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _wait_for_queue(self):
+        while self.queue.qsize() > self.max_queue_depth:
+            if self._stop_event.wait(0.001):
+                return
+
+    def _run(self):
+        data_dict = utils_streaming.get_replay_data(self.ig_names)
+        records = utils_streaming.merge_ticks([data_dict[name] for name in self.ig_names])
+        if records.size == 0:
+            return
+        starts, ends, deadlines = utils_streaming.get_replay_batches(records["utm"], self.speed, self.batch_window_ms, self.max_batch_ticks)
+        instrument_ids = np.asarray(self.instrument_ids, dtype=np.int64)[records["id"]].tolist()
+        timestamps = (records["utm"] / 1000).tolist()
+        bids = records["bid"].tolist()
+        asks = records["ask"].tolist()
+
+        put = self.queue.put
+        t_start = time.perf_counter()
+        for start, end, deadline in zip(starts.tolist(), ends.tolist(), deadlines.tolist()):
+            if self.speed is None:
+                self._wait_for_queue()
+            elif self._stop_event.wait(max(0.0, t_start + deadline - time.perf_counter())):
+                break
+            if self._stop_event.is_set():
+                break
+            for i in range(start, end):
+                put((instrument_ids[i], timestamps[i], bids[i], asks[i]))
+            self.n_ticks = end
+        t_total = time.perf_counter() - t_start
+        print(f"Replayed {self.n_ticks} ticks in {t_total:.2f}s ({self.n_ticks / max(t_total, 1e-9):.0f} ticks/s)")
+
+
+def create_streaming_application(instrument_container: List[str],
+                                 capital_ig_map: Dict[str, str],
+                                 queue_object: Queue,
+                                 speed: float | None=1,
+                                 ) -> ReplayService:
+    capital_names = list(instrument_container)
+    instrument_ids = utils_streaming.create_instrument_ids(capital_names)
+    stream_service = ReplayService([instrument_ids[name] for name in capital_names],
+                                   [capital_ig_map[name] for name in capital_names],
+                                   queue_object,
+                                   speed=speed)
+    stream_service.create_session()
+    stream_service.subscribe()
+    return stream_service
@@ -13,6 +13,7 @@ import requests
 def create_streaming_application(instrument_container: List[str],
                                  capital_epics: Dict[str, str],
                                 queue_object: Queue,
+                                speed: float | None=1,
                                 ) -> SyntheticService:
     
     session = requests.Session()
@@ -23,9 +24,10 @@ def create_streaming_application(instrument_container: List[str],
 
 
     mode, items, fields = utils_streaming.create_client_inputs(instrument_container, capital_epics)
-    market_subscription = synthetic_websocket.Subscription(mode=mode, items=items, fields=fields)
+    market_subscription = synthetic_websocket.Subscription(mode=mode, items=items, fields=fields, speed=speed)
 
-    listener = market_listener.MarketListener(queue_object)
+    instrument_ids = utils_streaming.create_instrument_ids(instrument_container)
+    listener = market_listener.MarketListener(queue_object, instrument_ids)
     market_subscription.addListener(listener)
     stream_service.subscribe(market_subscription)
     return stream_service
@@ -1,124 +1,164 @@
 from __future__ import annotations
-from typing import Set, Dict, TYPE_CHECKING
+from typing import Dict, List, TYPE_CHECKING
 if TYPE_CHECKING:
     from streaming.market_listener import MarketListener
     
+import argparse
 import json
 import asyncio
+from collections import deque
 import websockets
-from dataclasses import dataclass
 import threading
 from websockets.asyncio.client import connect
-from time_helpers.classes import PatchedDateTime
-from historical import builders as builders_historical
-
-
-def get_data(names):
-    data_dict = {}
-    for name in names:
-        df_i = builders_historical.retrieve_data(name, True)        
-        df_i["name"] = name
-        df_i_filtered = df_i.loc[df_i["UTM"] > PatchedDateTime.now().timestamp() * 1000].copy()
-        df_i_filtered.loc[df_i_filtered.index, "index_val"] = df_i_filtered["UTM"].values
-        df_i_filtered = df_i_filtered.set_index("UTM", drop=True)
-        df_i_filtered["UTM"] = df_i_filtered.index
-        df_i_filtered = df_i_filtered.dropna(axis=0, how="any")
-        df_i_filtered = df_i_filtered.astype(str)
-        data_dict[name] = df_i_filtered.to_dict(orient="index")
-        df_i_filtered
-    return data_dict
+from time_helpers import classes as classes_time_helpers
+from instruments.info import info_utils
+from streaming import utils as utils_streaming
+
+
+class ClientSender:
+    """
+    Bounded send queue of one client. The replay loops only put messages; run() sends
+    everything queued since its previous send as one message, so a slow client only
+    delays its own ticks. Once max_pending messages are waiting, the policy decides what
+    gives: "coalesce" keeps just the latest tick of each instrument, "drop" discards the
+    oldest message.
+    """
+    def __init__(self, websocket, max_pending: int=1024, policy: str="coalesce"):
+        if not policy in ("coalesce", "drop"):
+            raise ValueError(f"Unknown slow client policy: {policy}")
+        self.websocket = websocket
+        self.max_pending = max_pending
+        self.policy = policy
+        self.pending = deque()
+        self.n_dropped = 0
+        self._ready = asyncio.Event()
+
+    def put(self, message: bytes):
+        if len(self.pending) >= self.max_pending:
+            self._make_room()
+        self.pending.append(message)
+        self._ready.set()
+
+    def _make_room(self):
+        if self.policy == "coalesce":
+            message = b"".join(self.pending)
+            coalesced = utils_streaming.coalesce_ticks(message)
+            self.n_dropped += (len(message) - len(coalesced)) // utils_streaming.TICK_STRUCT.size
+            self.pending.clear()
+            self.pending.append(coalesced)
+        else:
+            self.n_dropped += len(self.pending.popleft()) // utils_streaming.TICK_STRUCT.size
+
+    async def run(self):
+        try:
+            while True:
+                await self._ready.wait()
+                self._ready.clear()
+                message = b"".join(self.pending)
+                self.pending.clear()
+                await self.websocket.send(message)
+        except websockets.exceptions.ConnectionClosed:
+            pass
 
-        
 
 class Websocket:
-    def __init__(self, instrument_names):
+    """
+    Replays the stored ticks of instrument_names to every connected client as binary
+    messages of utils_streaming.TICK_STRUCT records, the instrument id being the index
+    in instrument_names.
+
+    All instruments are merged into one time-ordered stream driven by a single replay
+    clock: the ticks due within the same batch_window_ms of wall-clock time are sent as
+    one message at an absolute deadline (replay start + market time elapsed / speed), so
+    timing does not drift and the order is the same on every run. speed=None replays as
+    fast as the clients read, in batches of max_batch_ticks.
+
+    Every client gets a ClientSender, and its first message is a JSON text frame listing
+    instrument_names so that clients subscribed to other names can map the ids.
+    """
+    def __init__(self, instrument_names, speed=1, batch_window_ms=1, max_batch_ticks=4096, max_pending=1024, slow_client_policy="coalesce"):
         self.host = "localhost"
         self.port = 8765
         self.instrument_names=instrument_names
         self.uniform_var=0.001
         self.dt=1
         self._server = None
-        self.data_dict = get_data(self.instrument_names)
-        self.time_dilation = 1
+        self.data_dict = None
+        self.speed = speed
+        self.batch_window_ms = batch_window_ms
+        self.max_batch_ticks = max_batch_ticks
+        self.max_pending = max_pending
+        self.slow_client_policy = slow_client_policy
         self.ms_to_s = 1/ 1000
         
-        self.clients: Set[websockets.WebSocketServerProtocol] = set()
-
-    def _get_sleep(self, value):
-        return self.time_dilation * value * self.ms_to_s
+        self.clients: Dict[websockets.WebSocketServerProtocol, ClientSender] = {}
 
     async def stop(self):
-        for client in self.clients.copy():
+        for client in list(self.clients):
             await client.close()
         self.clients.clear()
 
     async def handler(self, websocket):
-        self.clients.add(websocket)
+        await websocket.send(json.dumps({"instruments" : self.instrument_names}))
+        sender = ClientSender(websocket, self.max_pending, self.slow_client_policy)
+        self.clients[websocket] = sender
+        sender_task = asyncio.create_task(sender.run())
         try:
             await websocket.wait_closed()
         finally:
-            print(f"Client disconnected: {websocket.remote_address}")
-            self.clients.remove(websocket)
-
-    async def broadcast_loop(self, instrument_name: str):
-        data = self.data_dict[instrument_name]
-        timestamps = list(data.keys())
-        for i, (ts, data_message) in enumerate(data.items()):
-            data_message["instrument"] = instrument_name
-            for client in self.clients.copy():
-                try:
-                    await client.send(json.dumps(data_message))
-                except websockets.exceptions.ConnectionClosed:
-                    self.clients.remove(client)
+            sender_task.cancel()
+            print(f"Client disconnected: {websocket.remote_address} ({sender.n_dropped} ticks dropped)")
+            self.clients.pop(websocket, None)
 
-            if i + 1 < len(timestamps):
-                next_ts = timestamps[i + 1]
-                delay_ms = next_ts - ts
-                
-                await asyncio.sleep(self._get_sleep(delay_ms))
+    def send_to_clients(self, message: bytes):
+        for sender in self.clients.values():
+            sender.put(message)
 
-    async def start_server(self):
+    async def _wait_for_clients(self):
+        """Back-pressure at max speed: every client's queue drains below half before the next batch."""
+        await asyncio.sleep(0)
+        while any(len(sender.pending) > sender.max_pending // 2 for sender in self.clients.values()):
+            await asyncio.sleep(0.001)
+
+    async def replay_loop(self):
+        records = utils_streaming.merge_ticks([self.data_dict[name] for name in self.instrument_names])
+        if records.size == 0:
+            return
+        starts, ends, deadlines = utils_streaming.get_replay_batches(records["utm"], self.speed, self.batch_window_ms, self.max_batch_ticks)
+        loop = asyncio.get_running_loop()
+        t_start = loop.time()
+        for start, end, deadline in zip(starts.tolist(), ends.tolist(), deadlines.tolist()):
+            if self.speed is None:
+                await self._wait_for_clients()
+            else:
+                await asyncio.sleep(max(0.0, t_start + deadline - loop.time()))
+            self.send_to_clients(records[start:end].tobytes())
+
+    async def bind(self):
+        """Raises OSError if the port is taken, e.g. by a feed another chart process started."""
         self._server = await websockets.serve(self.handler, self.host, self.port)
 
+    async def start_server(self):
+        if self._server is None:
+            await self.bind()
+        if self.data_dict is None:
+            self.data_dict = utils_streaming.get_replay_data(self.instrument_names)
+
         while not self.clients:
             await asyncio.sleep(0.1)
 
-        tasks = [asyncio.create_task(self.broadcast_loop(name)) for name in self.instrument_names]
-        await asyncio.gather(*tasks)
+        await self.replay_loop()
 
         
     async def stop_server(self):
         if self._server is not None:
             self._server.close()
             await self._server.wait_closed()
-        for client in self.clients.copy():
+        for client in list(self.clients):
             await client.close()
         self.clients.clear()
 
 
-@dataclass(slots=True)
-class ItemUpdate:
-    name: str
-    bid: str
-    ask: str
-    timestamp: str
-    
-    def update_values(self, ts, b, a):
-        self.timestamp = ts
-        self.bid = b
-        self.ask = a
-    
-    def getItemName(self):
-        return self.name
-    
-    def getValue(self, idx):
-        if idx == 1:
-            return self.bid
-        elif idx == 2:
-            return self.ask
-        else:
-            return self.timestamp
-
 def get_item_name_map(items):
     item_name_map = {}
     for item in items:
@@ -127,7 +167,7 @@ def get_item_name_map(items):
     return item_name_map
 
 class Subscription:    
-    def __init__(self, mode=None, items=None, fields=None):
+    def __init__(self, mode=None, items=None, fields=None, speed=1):
         self.mode = mode
         self.items = items
         self.fields = fields
@@ -135,14 +175,23 @@ class Subscription:
         self.item_name_map=get_item_name_map(items)
         
         self.instrument_names = list(self.item_name_map.values()) 
-        self.item_update_objects={self.item_name_map[item] : ItemUpdate(item, "", "", "") for item in items}
+        self.speed = speed
+        self.server = None
+        self.server_task = None
+        self.websocket_client = None
          
     def addListener(self, listener: MarketListener):
         self.listener=listener
 
     async def start_websocket(self):
-        self.server = Websocket(self.instrument_names)
-        self.server_task = asyncio.create_task(self.server.start_server())
+        self.server = Websocket(self.instrument_names, speed=self.speed)
+        try:
+            await self.server.bind()
+        except OSError:
+            print(f"ws://{self.server.host}:{self.server.port} is taken, connecting to the running synthetic feed")
+            self.server = None
+        else:
+            self.server_task = asyncio.create_task(self.server.start_server())
                         
         async with connect(f"ws://localhost:8765") as self.websocket_client:
             loop = asyncio.get_event_loop()
@@ -156,11 +205,11 @@ class Subscription:
                         print(f"Connection closed with error: {e}")
                     break
                     
-                data: Dict = json.loads(message)
-                instrument = data["instrument"]
-                item_object = self.item_update_objects[instrument]
-                item_object.update_values(data["UTM"], data["BID"], data["OFR"])
-                self.listener.onItemUpdate(item_object)
+                if isinstance(message, str):
+                    server_names = json.loads(message)["instruments"]
+                    self.listener.set_tick_ids([name if name in self.instrument_names else None for name in server_names])
+                else:
+                    self.listener.on_ticks(message)
                 
     async def ws_operation(self,) -> None:
         await self.websocket_client.send(json.dumps({"some": "message"}))
@@ -203,3 +252,23 @@ class SyntheticService:
         self.loop.create_task(self.subscription.start_websocket())
         self.loop.run_forever()
 
+
+def run_server(instrument_names: List[str],
+               speed: float | None=1,
+               slow_client_policy: str="coalesce",
+               ) -> None:
+    """Standalone feed that several chart processes can connect to (each then skips starting its own)."""
+    classes_time_helpers.initialize_time_helpers(True)
+    server = Websocket(instrument_names, speed=speed, slow_client_policy=slow_client_policy)
+    asyncio.run(server.start_server())
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Standalone synthetic tick feed on ws://localhost:8765.")
+    parser.add_argument("names", nargs="*", help="capital names to replay (default: all)")
+    parser.add_argument("--speed", type=float, default=1, help="replay speed factor, 0 for as fast as the clients read")
+    parser.add_argument("--policy", choices=["coalesce", "drop"], default="coalesce")
+    args = parser.parse_args()
+
+    capital_ig_map, _ = info_utils.create_capital_ig_maps()
+    names = args.names or list(capital_ig_map)
+    run_server([capital_ig_map[name] for name in names], args.speed or None, args.policy)
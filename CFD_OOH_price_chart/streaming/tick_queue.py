@@ -0,0 +1,129 @@
+from __future__ import annotations
+from typing import List, Tuple
+
+import queue
+import threading
+
+
+class TickQueue:
+    """
+    Single-producer/single-consumer ring buffer of (instrument id, timestamp, bid, ask) ticks
+    between a streaming client and the WebsocketWorker.
+
+    The slots are preallocated column lists. The producer alone advances _head and the
+    consumer alone advances _tail, each after its slot stores, so under the GIL neither
+    side takes a lock. The consumer blocks in wait() instead of polling; the producer
+    only sets the wakeup event while the consumer is actually waiting, so a busy feed
+    costs no event operation per tick. A full buffer makes the producer wait for the
+    consumer rather than overwrite (counted in n_full_waits).
+
+    put/get_nowait/qsize mirror queue.Queue for the existing producers and consumers.
+    """
+    def __init__(self, capacity: int=1 << 16):
+        if capacity & (capacity - 1):
+            raise ValueError(f"capacity must be a power of two, got {capacity}")
+        self.capacity = capacity
+        self._mask = capacity - 1
+        self._ids: List[int] = [0] * capacity
+        self._timestamps: List[float] = [0.0] * capacity
+        self._bids: List[float] = [0.0] * capacity
+        self._asks: List[float] = [0.0] * capacity
+        self._head = 0
+        self._tail = 0
+        self.high_water = 0
+        self.n_full_waits = 0
+        self._consumer_waiting = False
+        self._producer_waiting = False
+        self._data_event = threading.Event()
+        self._space_event = threading.Event()
+
+    # producer side
+
+    def put_tick(self, instrument_id: int, timestamp: float, bid: float, ask: float) -> None:
+        head = self._head
+        if head - self._tail >= self.capacity:
+            self._wait_for_space()
+        idx = head & self._mask
+        self._ids[idx] = instrument_id
+        self._timestamps[idx] = timestamp
+        self._bids[idx] = bid
+        self._asks[idx] = ask
+        self._head = head + 1
+
+        depth = head + 1 - self._tail
+        if depth > self.high_water:
+            self.high_water = depth
+        if self._consumer_waiting:
+            self._data_event.set()
+
+    def put(self, item: Tuple[int, float, float, float], block: bool=True, timeout: float | None=None) -> None:
+        self.put_tick(*item)
+
+    def _wait_for_space(self) -> None:
+        self.n_full_waits += 1
+        self._producer_waiting = True
+        try:
+            while self._head - self._tail >= self.capacity:
+                self._space_event.wait(0.01)
+                self._space_event.clear()
+        finally:
+            self._producer_waiting = False
+
+    # consumer side
+
+    def qsize(self) -> int:
+        return self._head - self._tail
+
+    @property
+    def depth(self) -> int:
+        return self._head - self._tail
+
+    def empty(self) -> bool:
+        return self._head == self._tail
+
+    def get_nowait(self) -> Tuple[int, float, float, float]:
+        tail = self._tail
+        if tail == self._head:
+            raise queue.Empty
+        idx = tail & self._mask
+        item = (self._ids[idx], self._timestamps[idx], self._bids[idx], self._asks[idx])
+        self._tail = tail + 1
+        self._notify_space()
+        return item
+
+    def drain(self, max_items: int | None=None) -> Tuple[List[int], List[float], List[float], List[float]]:
+        """Everything queued (at most max_items) as instrument ids, timestamps, bids, asks lists in arrival order."""
+        tail = self._tail
+        n = self._head - tail
+        if not max_items is None:
+            n = min(n, max_items)
+        idx_start = tail & self._mask
+        idx_end = idx_start + n
+        if idx_end <= self.capacity:
+            columns = tuple(column[idx_start:idx_end] for column in (self._ids, self._timestamps, self._bids, self._asks))
+        else:
+            idx_end -= self.capacity
+            columns = tuple(column[idx_start:] + column[:idx_end] for column in (self._ids, self._timestamps, self._bids, self._asks))
+        self._tail = tail + n
+        self._notify_space()
+        return columns
+
+    def _notify_space(self) -> None:
+        if self._producer_waiting:
+            self._space_event.set()
+
+    def wait(self, timeout: float | None=None) -> bool:
+        """Blocks until a tick is queued, wake() is called or timeout passes; True if ticks are waiting."""
+        if self._head != self._tail:
+            return True
+        self._consumer_waiting = True
+        try:
+            if self._head == self._tail:
+                self._data_event.wait(timeout)
+                self._data_event.clear()
+        finally:
+            self._consumer_waiting = False
+        return self._head != self._tail
+
+    def wake(self) -> None:
+        self._data_event.set()
@@ -1,5 +1,27 @@
+from typing import List, Dict, Iterator, Tuple
+import struct
+import numpy as np
 from instruments.info import info_utils
+from time_helpers.classes import PatchedDateTime
+from historical import builders as builders_historical
+from historical.classes import TICK_COLUMNS
 
+# Binary tick record of the synthetic feed: instrument id (index into the subscribed
+# instrument names), UTM in ms, bid, ask. A message is one or more records back to back.
+TICK_STRUCT = struct.Struct("<Hddd")
+TICK_DTYPE = np.dtype([("id", "<u2"), ("utm", "<f8"), ("bid", "<f8"), ("ask", "<f8")])
+
+
+def create_instrument_ids(instrument_list) -> Dict[str, int]:
+    """
+    Dense integer id of every streamed instrument: its position in instrument_list
+    (the instrument container). Ticks carry this id from the listener to the
+    application, which indexes its instruments by the same positions.
+    """
+    return {name : instrument_id for instrument_id, name in enumerate(instrument_list)}
+
+def get_tick_item(ig_epic: str) -> str:
+    return f"CHART:{ig_epic}:TICK"
 
 def create_client_inputs(instrument_list,
                          capital_ig_map):
@@ -14,9 +36,79 @@ def create_client_inputs(instrument_list,
             "LOW",]
     mode = "MERGE"
     
-    items = [f"CHART:{epic}:TICK" for epic in ig_epics]
+    items = [get_tick_item(epic) for epic in ig_epics]
     mode = "DISTINCT" 
     fields = ["BID", "OFR", "UTM"]
     
     return mode, items, fields
-    
+
+
+def pack_ticks(instrument_id: int,
+               utm: np.ndarray,
+               bid: np.ndarray,
+               ask: np.ndarray,
+               ) -> np.ndarray:
+    """TICK_DTYPE records of one instrument; records[i:j].tobytes() is a ready message."""
+    records = np.empty(utm.size, dtype=TICK_DTYPE)
+    records["id"] = instrument_id
+    records["utm"] = utm
+    records["bid"] = bid
+    records["ask"] = ask
+    return records
+
+def merge_ticks(columns: List[Tuple[np.ndarray, np.ndarray, np.ndarray]]) -> np.ndarray:
+    """
+    One time-ordered stream of TICK_DTYPE records from the (UTM, bid, ask) columns of
+    every instrument, the instrument id being its position in columns. Ties keep the
+    order of columns and then of the ticks, so the stream is the same on every run.
+    """
+    if not columns:
+        return np.empty(0, dtype=TICK_DTYPE)
+    records = np.concatenate([pack_ticks(instrument_id, *column) for instrument_id, column in enumerate(columns)])
+    return records[np.argsort(records["utm"], kind="stable")]
+
+def iter_ticks(message: bytes) -> Iterator[Tuple[int, float, float, float]]:
+    return TICK_STRUCT.iter_unpack(message)
+
+def coalesce_ticks(message: bytes) -> bytes:
+    """Keeps only the last record of each instrument in message, in the order of those records."""
+    records = np.frombuffer(message, dtype=TICK_DTYPE)
+    _, idx_last_reversed = np.unique(records["id"][::-1], return_index=True)
+    return records[np.sort(records.size - 1 - idx_last_reversed)].tobytes()
+
+
+def get_replay_data(ig_names: List[str]) -> Dict[str, Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """(UTM, bid, ask) float64 arrays of every test-data epic from now on, rows with a missing field dropped."""
+    store = builders_historical.get_tick_store(True)
+    index = builders_historical.get_epic_file_index(True, store)
+    start_time = PatchedDateTime.now().timestamp()
+    columns_container, _ = builders_historical.load_parallel(ig_names,
+                                                             lambda name: builders_historical.retrieve_columns(name, True, store, index, start_time))
+    data_dict = {}
+    for name in ig_names:
+        utm, bid, ask = (np.asarray(columns_container[name][column]) for column in TICK_COLUMNS)
+        keep = (utm > start_time * 1000) & ~(np.isnan(bid) | np.isnan(ask))
+        data_dict[name] = (utm[keep], bid[keep], ask[keep])
+    return data_dict
+
+def get_replay_batches(utm: np.ndarray,
+                       speed: float | None,
+                       batch_window_ms: float,
+                       max_batch_ticks: int,
+                       ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Splits a time-ordered replay into batches: the ticks due within the same
+    batch_window_ms of wall-clock time at speed, or max_batch_ticks at a time at max
+    speed (speed None). Returns the start/end positions of the batches and the deadline
+    of each in seconds after the replay start (all 0 at max speed).
+    """
+    if speed is None:
+        starts = np.arange(0, utm.size, max_batch_ticks)
+        deadlines = np.zeros(starts.size)
+    else:
+        offsets = (utm - utm[0]) / 1000 / speed
+        windows = np.floor(offsets / (batch_window_ms / 1000)).astype(np.int64)
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(windows)) + 1))
+        deadlines = offsets[starts]
+    ends = np.append(starts[1:], utm.size)
+    return starts, ends, deadlines
@@ -1,7 +1,7 @@
 from __future__ import annotations
 from typing import List, Dict, Union, Tuple, Callable, TYPE_CHECKING
 if TYPE_CHECKING:
-    from instruments.classes import PriceInstrument, BaseInstrument
+    from instruments.classes import PriceInstrument, BaseInstrument, InstrumentSpecs
     from timeseries.classes import TimeSeries, ParentTimeSeries
     from .classes import SubPlotStructure
 
@@ -15,6 +15,41 @@ from time_helpers.classes import PatchedDateTime
 from time_helpers import utils as utils_time_helpers
 
 
+def _find_close_point(instrument_specs: InstrumentSpecs) -> float | None:
+    if instrument_specs.close_time is None:
+        return None
+    current_time_market_tz = PatchedDateTime.now().astimezone(pytz.timezone(instrument_specs.timezone))
+    open_periods, closed_periods = builders_time_helpers.create_open_closed_periods(current_time_market_tz,
+                                                                                    instrument_specs.timezone,
+                                                                                    instrument_specs.holiday_schedule,
+                                                                                    instrument_specs.weekday_open_schedule,
+                                                                                    instrument_specs.weekday_closed_schedule,
+                                                                                    instrument_specs.open_time,
+                                                                                    instrument_specs.close_time,
+                                                                                    14)
+    
+    return utils_time_helpers.get_most_recent_close_timestamp(instrument_specs.timezone,
+                                                              closed_periods)
+
+
+def get_history_start_time(plot_configs: Dict[str, Dict[str, str]],
+                           instrument_specs_container: Dict[str, InstrumentSpecs],
+                           margin: float,
+                           ) -> float | None:
+    """
+    Earliest close point across the subplot configs minus margin (seconds), i.e. the
+    first timestamp any subplot needs from the historical data.
+    """
+    close_points = []
+    for config in plot_configs.values():
+        close_point = _find_close_point(instrument_specs_container[config["focus_instrument"]])
+        if not close_point is None:
+            close_points.append(close_point)
+    if not close_points:
+        return None
+    return min(close_points) - margin
+
+
 def create_subplot_structure_containers(plot_configs: Dict[str, Dict[str, str]],
                                         timeseries_parent_container: Dict[str, ParentTimeSeries],
                                         instrument_container: Dict[str, PriceInstrument],
@@ -24,20 +59,8 @@ def create_subplot_structure_containers(plot_configs: Dict[str, Dict[str, str]],
     for name, config in plot_configs.items():
         focus_instrument = config["focus_instrument"]
         instrument_specs = instrument_container[focus_instrument].specs
-        if not instrument_specs.close_time is None:
-            current_time_market_tz = PatchedDateTime.now().astimezone(pytz.timezone(instrument_specs.timezone))
-            open_periods, closed_periods = builders_time_helpers.create_open_closed_periods(current_time_market_tz,
-                                                                                            instrument_specs.timezone,
-                                                                                            instrument_specs.holiday_schedule,
-                                                                                            instrument_specs.weekday_open_schedule,
-                                                                                            instrument_specs.weekday_closed_schedule,
-                                                                                            instrument_specs.open_time,
-                                                                                            instrument_specs.close_time,
-                                                                                            14)
-            
-            most_recent_close_timestamp = utils_time_helpers.get_most_recent_close_timestamp(instrument_specs.timezone,
-                                                                                             closed_periods)
-            
+        most_recent_close_timestamp = _find_close_point(instrument_specs)
+        if not most_recent_close_timestamp is None:
             most_recent_close_date = PatchedDateTime.fromtimestamp(most_recent_close_timestamp).date()
             if PatchedDateTime.now().date() != most_recent_close_date:
                 print(f"\n{name} has its closest close time {PatchedDateTime.fromtimestamp(most_recent_close_timestamp)}. Make sure the dir /historical/data/todays_data/{most_recent_close_date}/\n")
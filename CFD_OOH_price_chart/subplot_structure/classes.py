@@ -134,7 +134,7 @@ class SubPlotStructure:
                 timeseries_parent = self.timeseries_parent_container[name]
                 
                 dummy_timeseries_child = timeseries_parent.create_child(start_time=timestamp,
-                                                                        end_time=np.amax(timeseries_parent.timestamps),
+                                                                        end_time=timeseries_parent.get_last_timestamp(),
                                                                         metric_type="mid", 
                                                                         metric_type_displayed_child=self.metric_attributes["metric_type_displayed_child"], 
                                                                         value_attr_parent=value_attr_parent,
@@ -154,19 +154,18 @@ class SubPlotStructure:
 
     def create_init_subsets(self, timestamp: float):
         for name, timeseries_parent in self.timeseries_parent_container.items():
-            instrument_parent = self.instrument_parent_container[name]
             timeseries_child = timeseries_parent.create_child(start_time=timestamp,
-                                                              end_time=np.amax(timeseries_parent.timestamps),
+                                                              end_time=timeseries_parent.get_last_timestamp(),
                                                               metric_type=self.metric_attributes["major"], 
                                                               scale=self.metric_attributes["scale"],
                                                               value_attr_parent=self.metric_attributes["value_attr_parent"],
                                                              )
             if name in self.timeseries_container:
                 old_timeseries = self.timeseries_container[name]
-                instrument_parent.remove_update_callback(old_timeseries.update)
+                timeseries_parent.remove_update_callback(old_timeseries.update)
 
             
-            instrument_parent.add_update_callback(timeseries_child.update)
+            timeseries_parent.add_update_callback(timeseries_child.update)
             
             
             timeseries_child.parent_minor_metrics={self.metric_attributes["minor"] : None}
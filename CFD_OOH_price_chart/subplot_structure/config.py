@@ -60,6 +60,11 @@ def _get_maps():
     plot_maps = {d["name"]: d for d in all_maps}    
     return plot_maps
 
+def get_history_params():
+    history_params = {"margin" : 60 * 60,  # seconds of ticks loaded before the earliest subplot close point
+                      }
+    return history_params
+
 def get_config():
     plot_maps = _get_maps()
 
@@ -478,4 +478,37 @@ c_s_f_using_metric_engine = me.evaluate_array()
 
 
 
+#%%
+
+import timeit
+
+setup_code = """
+import ast
+import numpy as np
+from mathematics import numerics
+
+expr = "100*(DE40/US500-1)"
+env = {**numerics._FUNC_SCALAR}
+code = compile(ast.parse(expr, mode="eval"), "<expr>", "eval")
+eval_scalar = lambda d: eval(code, {"__builtins__": None, **env}, d)
+env_array = {**numerics._FUNC_ARRAY}
+eval_array = lambda d: eval(code, {"__builtins__": None, **env_array}, d)
+
+graph = numerics.ExpressionGraph(expr)
+data = {"DE40" : 24000.5, "US500" : 6400.25}
+data_array = {"DE40" : np.random.uniform(23000, 25000, 100000), "US500" : np.random.uniform(6000, 7000, 100000)}
+out = np.empty(100000)
+"""
+
+time_eval_scalar = timeit.timeit("eval_scalar(data)", setup=setup_code, number=1000000)
+time_graph_scalar = timeit.timeit("graph.evaluate_scalar(data)", setup=setup_code, number=1000000)
+time_eval_array = timeit.timeit("eval_array(data_array)", setup=setup_code, number=1000)
+time_graph_array = timeit.timeit("graph.evaluate_array(data_array, out=out)", setup=setup_code, number=1000)
+
+print(f"Scalar eval: {time_eval_scalar:.6f} seconds")
+print(f"Scalar ExpressionGraph: {time_graph_scalar:.6f} seconds")
+print(f"Array eval: {time_eval_array:.6f} seconds")
+print(f"Array ExpressionGraph (out=): {time_graph_array:.6f} seconds")
+
+
 #%%
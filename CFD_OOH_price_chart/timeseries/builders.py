@@ -6,25 +6,24 @@ if TYPE_CHECKING:
     
 import pandas as pd
 from . import classes as classes_timeseries
+from custom_numpy import GrowableArray
 import numpy as np
 
-def create_parent_timeseries_container(data_all: Dict[str, pd.DataFrame]
+def create_parent_timeseries_container(data_all: Dict[str, Dict[str, np.ndarray]]
                                        ) -> TimeSeries:
     time_series_containers={}
-    for name, df in data_all.items():
-        time_series_containers[name] = _create_parent_timeseries(name, df)
+    for name, data in data_all.items():
+        time_series_containers[name] = _create_parent_timeseries(name, data)
     return time_series_containers
     
 def _create_parent_timeseries(instrument_name: str,
-                              data: pd.DataFrame
+                              data: Dict[str, np.ndarray]
                               ) -> TimeSeries:
-    data_metrics = data[["bid", "ask"]].values
-    bid, ask = data_metrics[:,0], data_metrics[:,1]
     kwargs = {"name" : instrument_name,
               "metric_type" : "price",
-              "timestamps" : data.index.tolist(),        
-              "bid" : bid,
-              "ask" : ask,
+              "timestamps" : GrowableArray(data["timestamp"]),        
+              "bid" : GrowableArray(data["bid"]),
+              "ask" : GrowableArray(data["ask"]),
               }
     return classes_timeseries.ParentTimeSeries(**kwargs)
 
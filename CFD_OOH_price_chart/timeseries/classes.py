@@ -10,7 +10,7 @@ if TYPE_CHECKING:
 from dataclasses import dataclass, field, InitVar
 import bottleneck
 import numpy as np
-from custom_numpy import BufferArray
+from custom_numpy import BufferArray, GrowableArray, merge_sorted_union
 from itertools import permutations
 from datetime import datetime
 from abc import ABC, abstractmethod
@@ -23,6 +23,7 @@ class _BaseTimeSeries(ABC):
     metric_type: str | List[str]
     timestamps: List[float] | BufferArray | np.ndarray
     _update_callbacks: List[Callable] = field(default_factory=lambda: [])
+    n_last_update: int = field(default_factory=lambda: 1)  # points appended by the last update (a batch appends several)
     
     def update_cleanup(self):
         for callback in self._update_callbacks:
@@ -48,16 +49,87 @@ class _BaseTimeSeries(ABC):
 
 @dataclass(slots=True, kw_only=True)
 class ParentTimeSeries(_BaseTimeSeries):
+    """
+    Single store of an instrument's ticks. It is the only series registered on the
+    PriceInstrument; subplot children are TimeSeriesView objects reading its columns
+    from an offset, and derived columns (e.g. the mid used by price children) are
+    computed once per tick here rather than once per child.
+    """
     metric_type: List[str] = field(default_factory=lambda: ["bid", "ask", "mid"])
-    bid: List[float] = field(default_factory=list)
-    ask: List[float] = field(default_factory=list)
+    timestamps: GrowableArray = field(default_factory=GrowableArray)
+    bid: GrowableArray = field(default_factory=GrowableArray)
+    ask: GrowableArray = field(default_factory=GrowableArray)
+    derived_columns: Dict[str, GrowableArray] = field(default_factory=dict)
+    _derived_functions: Dict[str, Callable] = field(default_factory=dict)
+
+    def __post_init__(self):
+        for attr in ("timestamps", "bid", "ask"):
+            if not isinstance(getattr(self, attr), GrowableArray):
+                setattr(self, attr, GrowableArray(getattr(self, attr)))
 
     def update(self, instrument: PriceInstrument):
         self.timestamps.append(instrument.timestamp)
         self.bid.append(instrument.bid)
         self.ask.append(instrument.ask) 
+        for name, function in self._derived_functions.items():
+            self.derived_columns[name].append(function(instrument.bid, instrument.ask))
+        self.n_last_update = 1
         self.update_cleanup()
 
+    def update_batch(self,
+                     instrument: PriceInstrument,
+                     timestamps: np.ndarray,
+                     bids: np.ndarray,
+                     asks: np.ndarray,
+                     ):
+        self.timestamps.extend(timestamps)
+        self.bid.extend(bids)
+        self.ask.extend(asks)
+        for name, function in self._derived_functions.items():
+            self.derived_columns[name].extend(function(bids, asks))
+        self.n_last_update = timestamps.size
+        self.update_cleanup()
+
+    def __len__(self):
+        return self.timestamps.n
+
+    @property
+    def timestamp(self) -> float:
+        return self.timestamps.get_last_value()
+
+    @property
+    def value(self) -> Tuple[float, float]:
+        return self.bid.get_last_value(), self.ask.get_last_value()
+
+    def get_timestamps(self) -> np.ndarray:
+        return self.timestamps.get_array()
+
+    def get_bid(self) -> np.ndarray:
+        return self.bid.get_array()
+
+    def get_ask(self) -> np.ndarray:
+        return self.ask.get_array()
+
+    def get_column(self, name: str) -> np.ndarray:
+        if name in self.derived_columns:
+            return self.derived_columns[name].get_array()
+        return getattr(self, name).get_array()
+
+    def get_last_timestamp(self) -> float:
+        return self.timestamps.get_last_value()
+
+    def get_last_values(self) -> Tuple[float, float, float]:
+        return self.timestamps.get_last_value(), self.bid.get_last_value(), self.ask.get_last_value()
+
+    def add_derived_column(self,
+                           name: str,
+                           function: Callable[[float|np.ndarray, float|np.ndarray], float|np.ndarray],
+                           ) -> None:
+        if name in self.derived_columns:
+            return
+        self.derived_columns[name] = GrowableArray(function(self.get_bid(), self.get_ask()))
+        self._derived_functions[name] = function
+
     def create_child_at_idx(self,
                             idx_1: int=None,
                             idx_2: int=None,
@@ -65,24 +137,27 @@ class ParentTimeSeries(_BaseTimeSeries):
                             scale: str | None=None,
                             value_attr_parent: List[str]|str=None,
                             metric_engine: MetricConverter | MetricEngine=None,
-                            ) -> TimeSeries:
-        if idx_1 is None:
+                            ) -> TimeSeriesView:
+        if idx_1 is None or idx_1 < 0:
             idx_1 = 0
         if idx_2 is None:
-            idx_2 = len(self.timestamps)
+            idx_2 = len(self)
         
-        timestamps = np.array(self.timestamps[idx_1:idx_2])
         if value_attr_parent == "mid":
-            convert_values_arg = (self.bid[idx_1:idx_2], self.ask[idx_1:idx_2])
+            convert_values_arg = (self.get_bid()[idx_1:idx_2], self.get_ask()[idx_1:idx_2])
         else:
-            convert_values_arg = getattr(self, value_attr_parent)[idx_1:idx_2]   
+            convert_values_arg = self.get_column(value_attr_parent)[idx_1:idx_2]   
         if metric_engine is None:
             metric_engine = math_numerics.MetricConverter(values=convert_values_arg,
                                                           metric=metric_type,
                                                           scale=scale,
                                                           )
         
-        values = metric_engine.base(*convert_values_arg)
+        if value_attr_parent == "mid":
+            column = f"{metric_type}_base"
+            self.add_derived_column(column, metric_engine.base)
+        else:
+            column = value_attr_parent
 
         if isinstance(value_attr_parent, list):
             value_attr_parent_converter = "value"
@@ -91,11 +166,12 @@ class ParentTimeSeries(_BaseTimeSeries):
         kwargs = {"name" : self.name,
                   "metric_type" : metric_type,
                   "value_attr_parent" : value_attr_parent_converter,
-                  "timestamps" : BufferArray(timestamps),
-                  "values" : BufferArray(values),
                   "metric_engine" : metric_engine,
+                  "parent" : self,
+                  "column" : column,
+                  "idx_start" : idx_1,
                   }
-        return TimeSeries(**kwargs)
+        return TimeSeriesView(**kwargs)
         
     def create_child(self,
                      start_time: float | None=None,
@@ -103,13 +179,13 @@ class ParentTimeSeries(_BaseTimeSeries):
                      metric_type: str | None=None,
                      scale: str | None=None,
                      value_attr_parent: str | None=None,
-                     ) -> TimeSeries:
-        idx_1, idx_2 = self.find_idx_filters(self.timestamps,
+                     ) -> TimeSeriesView:
+        idx_1, idx_2 = self.find_idx_filters(self.get_timestamps(),
                                              start_time,
                                              end_time,
                                              )
-        if idx_1 == len(self.timestamps)-1:
-            idx_1 = len(self.timestamps) - 3
+        if idx_1 == len(self)-1:
+            idx_1 = len(self) - 3
         return self.create_child_at_idx(idx_1,
                                         idx_2,
                                         metric_type,
@@ -233,51 +309,143 @@ class TimeSeries(_BaseTimeSeries):
     
     
         
+@dataclass(slots=True, kw_only=True)
+class TimeSeriesView(TimeSeries):
+    """
+    Zero-copy child of a ParentTimeSeries: its timestamps and values are slices of the
+    parent's columns from idx_start onwards, so a tick is stored once per instrument
+    however many subplots display it. update is registered on the parent.
+    """
+    parent: ParentTimeSeries
+    column: str
+    idx_start: int = field(default_factory=lambda: 0)
+
+    def __post_init__(self):
+        self.idx_ub = len(self.parent) - self.idx_start
+
+    def update(self, parent: ParentTimeSeries):
+        self.n_last_update = parent.n_last_update
+        self.get_parent_metrics(parent)
+        self.update_cleanup()
+
+    def get_values(self):
+        return self.parent.get_column(self.column)[self.idx_start:]
+    
+    def get_timestamps(self):
+        return self.parent.get_timestamps()[self.idx_start:]
+    
+    def get_last_value(self):
+        return self.get_values()[-1]
+    
+    def get_last_timestamp(self):
+        return self.parent.get_last_timestamp()
+    
+    def get_data(self):
+        return self.get_timestamps(), self.get_values()
+
+    def set_data(self, timestamps, values):
+        self.idx_start = int(np.searchsorted(self.parent.get_timestamps(), timestamps[0], side="left"))
+
+    def subset(self, timestamp):
+        self.idx_start = max(int(np.searchsorted(self.parent.get_timestamps(), timestamp, side="right")) - 1, 0)
+        self.update_cleanup()
+
+    def clone_without_callbacks(self) -> TimeSeriesView:
+        return TimeSeriesView(name=self.name,
+                              metric_type=self.metric_type,
+                              value_attr_parent=self.value_attr_parent, 
+                              metric_engine=self.metric_engine,
+                              parent=self.parent,
+                              column=self.column,
+                              idx_start=self.idx_start,
+                              )
+
+    
 @dataclass(slots=True, kw_only=True)
 class TheoTimeSeries(TimeSeries):
     parent_series_container: Dict[str, CustomPlotDataItem] = field(default_factory=dict) 
-    values_expanded_parent_container: Dict[str, np.ndarray] = field(default_factory=dict)  # This is data expanded to the union timestamps without forward-fill
-    idx_parent_container: Dict[str, np.ndarray] = field(default_factory=dict)
+    values_expanded_parent_container: Dict[str, GrowableArray] = field(default_factory=dict)  # This is data expanded to the union timestamps without forward-fill
+    idx_parent_container: Dict[str, GrowableArray] = field(default_factory=dict)
     idx_lb_parent_container: Dict[str, np.ndarray] = field(default_factory=dict)
+    ffill_parent_container: Dict[str, GrowableArray] = field(default_factory=dict)  # Forward-filled expanded data, kept in sync lazily by evaluate_timeseries_on_view
+    _evaluated_idx_lb: int | None = field(default_factory=lambda: None)
     
     def __post_init__(self):
         super(TheoTimeSeries, self).__post_init__()
 
         
     def update(self, parent: CustomPlotDataItem):
-        timestamp, value = parent.dataset_last_values()
-        last_ts = self.get_last_timestamp()
-        if timestamp < last_ts:
-            timestamp = last_ts + 1e-3
-        self.timestamps.append(timestamp)
-        self.values.append(self.metric_engine({parent.name() : value}))
-        
-        for name, expanded_parent in self.values_expanded_parent_container.items():
-            if name == parent.name():
-                self.values_expanded_parent_container[name] = np.append(expanded_parent, value)
-                self.idx_parent_container[name] = np.append(self.idx_parent_container[parent.name()], self.values_expanded_parent_container[name].size-1)
-            else:
-                self.values_expanded_parent_container[name] = np.append(expanded_parent, np.nan)
+        """
+        Appends one union slot per parent point added since the parent's last update, so
+        that a batched parent update keeps idx_parent_container aligned with its points.
+        """
+        x, y = parent.dataset()
+        n_new = min(parent.timeseries.n_last_update, x.size)
+        name_parent = parent.name()
+        for timestamp, value in zip(x[x.size-n_new:].tolist(), y[y.size-n_new:].tolist()):
+            last_ts = self.get_last_timestamp()
+            if timestamp < last_ts:
+                timestamp = last_ts + 1e-3
+            self.timestamps.append(timestamp)
+            self.values.append(self.metric_engine({name_parent : value}))
+
+            for name, expanded_parent in self.values_expanded_parent_container.items():
+                if name == name_parent:
+                    expanded_parent.append(value)
+                    self.idx_parent_container[name].append(expanded_parent.n-1)
+                else:
+                    expanded_parent.append(np.nan)
+        self.n_last_update = n_new
                 
         self.get_parent_metrics(parent)
         self.update_cleanup()
         
     def get_parent_metrics(self, parent: CustomPlotDataItem):
         for metric_name in self.metric_callbacks:
+            if not self.metric_engine_minor is None:
+                self.metric_engine_minor.update_data_dict(parent.minor_value, parent.name())
             self.parent_minor_metrics[parent.metric_minor][parent.name()] = parent.minor_value
 
     def evaluate_timeseries_on_view(self):
-        new_value_dict={}
+        """
+        Writes the parents' viewed values into the expanded columns and re-evaluates only
+        from the first union index that changed (or that the forward-filled columns
+        have not caught up to since the last ticks). The forward fill of that range is
+        seeded with the last filled value before it.
+        """
+        n_union = self.timestamps.n
+        idx_start = n_union
         for name, plotdataitem in self.parent_series_container.items():
             _, values = plotdataitem.view_set()
-            idx = self.idx_parent_container[name]
+            idx = self.idx_parent_container[name].get_array()
             idx = idx[-values.size:]
-            self.values_expanded_parent_container[name][idx] = values
-            ffill_vals = bottleneck.push(self.values_expanded_parent_container[name])
-            
-            new_value_dict[name] = ffill_vals[self.idx_lb:]            
+            values_expanded = self.values_expanded_parent_container[name].get_array()
+            current = values_expanded[idx]
+            changed = np.flatnonzero((current != values) & ~(np.isnan(current) & np.isnan(values)))
+            if changed.size > 0:
+                values_expanded[idx] = values
+                idx_start = min(idx_start, int(idx[changed[0]]))
+            ffill = self.ffill_parent_container.get(name, None)
+            idx_start = min(idx_start, 0 if ffill is None else ffill.n)
             self.metric_engine.update_data_dict(values[-1], name)
-        self.values = BufferArray(self.metric_engine.evaluate_array(new_value_dict))
+
+        for name, expanded in self.values_expanded_parent_container.items():
+            ffill = self.ffill_parent_container.setdefault(name, GrowableArray())
+            segment = expanded.get_array()[idx_start:].copy()
+            if idx_start > 0 and segment.size > 0 and np.isnan(segment[0]):
+                segment[0] = ffill.get_array()[idx_start-1]
+            ffill.replace_tail(idx_start, bottleneck.push(segment))
+
+        full_evaluation = self._evaluated_idx_lb != self.idx_lb or self.values.n != n_union - self.idx_lb
+        idx_eval = self.idx_lb if full_evaluation else max(idx_start, self.idx_lb)
+        if idx_eval >= n_union and not full_evaluation:
+            return
+        new_value_dict = {name : ffill.get_array()[idx_eval:] for name, ffill in self.ffill_parent_container.items()}
+        if full_evaluation:
+            self.values = BufferArray(self.metric_engine.evaluate_array(new_value_dict))
+            self._evaluated_idx_lb = self.idx_lb
+        else:
+            self.metric_engine.evaluate_array(new_value_dict, out=self.values[idx_eval - self.idx_lb:self.values.n])
         
     def update_displayed_dataset_bounds(self,
                                         view_box: CustomViewBox,
@@ -296,26 +464,22 @@ class TheoTimeSeries(TimeSeries):
         idx_container={}
         values_expanded_parent_container = {}
         _ffill_values_expanded_parent_container={}
+        ffill_container={}
         idx_lb_container={}
         
-        ts_combined = np.array([])
-        for name_parent, series_parent in container.items():
-            ts, _ = getattr(series_parent, data_call)()
-            ts_combined = np.append(ts_combined, ts)
-        ts_combined = np.unique(ts_combined)
+        parent_data = {name_parent : getattr(series_parent, data_call)() for name_parent, series_parent in container.items()}
+        ts_combined, idx_list = merge_sorted_union([np.asarray(ts, dtype=np.float64) for ts, _ in parent_data.values()])
         ts_idx_lb = np.searchsorted(ts_combined, timestamp)
         ts_idx_lb=0
-        for name_parent, series_parent in container.items():
-            ts, _ = getattr(series_parent, data_call)()
-            idx = np.searchsorted(ts_combined, ts)
-            idx_container[name_parent] = idx
+        for (name_parent, (_, parent_values)), idx in zip(parent_data.items(), idx_list):
+            idx_container[name_parent] = GrowableArray(idx, dtype=np.int64)
             values_expanded = np.full_like(ts_combined, np.nan)
-            _, parent_values = getattr(series_parent, data_call)()
             
             values_expanded[idx] = parent_values
 
-            values_expanded_parent_container[name_parent] = values_expanded
+            values_expanded_parent_container[name_parent] = GrowableArray(values_expanded)
             _ffill_values_expanded_parent_container[name_parent] = bottleneck.push(values_expanded)
+            ffill_container[name_parent] = GrowableArray(_ffill_values_expanded_parent_container[name_parent])
 
             ts_expanded = bottleneck.push(np.full_like(ts_combined, np.nan))
             idx_lb_container[name_parent] = np.searchsorted(ts_expanded, timestamp, side="left")
@@ -329,6 +493,8 @@ class TheoTimeSeries(TimeSeries):
         kwargs_child["values_expanded_parent_container"]=values_expanded_parent_container
         kwargs_child["idx_lb_parent_container"] = idx_lb_container
         kwargs_child["idx_parent_container"]=idx_container
+        kwargs_child["ffill_parent_container"]=ffill_container
+        kwargs_child["_evaluated_idx_lb"]=ts_idx_lb
         return cls(**kwargs_child)
 
     
@@ -2,17 +2,22 @@ from PySide6 import QtCore
 import asyncio
 import queue
 import time
+import numpy as np
+from streaming.tick_queue import TickQueue
 
 class WebsocketWorker(QtCore.QThread):
-    update_signal = QtCore.Signal(str, float, float, float)  
+    update_signal = QtCore.Signal(int, float, float, float)  
+    batch_signal = QtCore.Signal(object)
     
-    def __init__(self, queue: queue.Queue=None):
+    def __init__(self, queue: queue.Queue | TickQueue=None, use_batches: bool=True, batch_interval_ms: int=16):
         super().__init__()
         self.queue=queue
         self._should_stop = False
         self._is_running = True  
         self.use_callbacks=False
         self.use_run_queue=True
+        self.use_batches=use_batches
+        self.batch_interval_ms=batch_interval_ms
     
     def run_queue(self):
         while True:
@@ -22,11 +27,72 @@ class WebsocketWorker(QtCore.QThread):
             except queue.Empty:
                 break 
 
+    def run_queue_batched(self):
+        """
+        Drains everything queued since the last frame and emits it as one batch_signal:
+        ({instrument id : (timestamps, bids, asks)}, ticks), the per-instrument float64
+        arrays plus the (instrument ids, timestamps, bids, asks) lists of all ticks in
+        arrival order, for callbacks that need the order across instruments.
+        """
+        instrument_ids, timestamps, bids, asks = [], [], [], []
+        while True:
+            try:
+                instrument_id, timestamp, bid, ask = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            instrument_ids.append(instrument_id)
+            timestamps.append(timestamp)
+            bids.append(bid)
+            asks.append(ask)
+        self._emit_batch(instrument_ids, timestamps, bids, asks)
+
+    def _emit_batch(self, instrument_ids, timestamps, bids, asks):
+        if not instrument_ids:
+            return
+        ticks = (instrument_ids, timestamps, bids, asks)
+        instrument_ids = np.asarray(instrument_ids, dtype=np.intp)
+        order = np.argsort(instrument_ids, kind="stable")
+        instrument_ids = instrument_ids[order]
+        starts = np.flatnonzero(np.r_[True, instrument_ids[1:] != instrument_ids[:-1]])
+        ends = np.r_[starts[1:], instrument_ids.size]
+        timestamps, bids, asks = (np.asarray(column, dtype=np.float64)[order] for column in (timestamps, bids, asks))
+        groups = {instrument_id : (timestamps[start:end], bids[start:end], asks[start:end])
+                  for instrument_id, start, end in zip(instrument_ids[starts].tolist(), starts.tolist(), ends.tolist())}
+        self.batch_signal.emit((groups, ticks))
+
+    def run_tick_queue(self):
+        """
+        Event-driven consumer of a TickQueue: the thread sleeps in TickQueue.wait until a
+        tick arrives instead of waking up every millisecond. With batches, ticks are
+        emitted at most once per batch_interval_ms, as in run_queue_batched.
+        """
+        interval = self.batch_interval_ms / 1000
+        t_last_batch = 0.0
+        while self._is_running:
+            if not self.queue.wait(timeout=0.1):
+                continue
+            if not self.use_batches:
+                for response in zip(*self.queue.drain()):
+                    self.update_signal.emit(*response)
+                continue
+            t_wait = t_last_batch + interval - time.perf_counter()
+            if t_wait > 0:
+                time.sleep(t_wait)
+            t_last_batch = time.perf_counter()
+            self._emit_batch(*self.queue.drain())
+
     def run(self):
+        if isinstance(self.queue, TickQueue):
+            self.run_tick_queue()
+            return
         if self.use_run_queue:
             self.queue_timer = QtCore.QTimer()
-            self.queue_timer.timeout.connect(self.run_queue)
-            self.queue_timer.start(1)
+            if self.use_batches:
+                self.queue_timer.timeout.connect(self.run_queue_batched)
+                self.queue_timer.start(self.batch_interval_ms)
+            else:
+                self.queue_timer.timeout.connect(self.run_queue)
+                self.queue_timer.start(1)
         
         self.exec_() 
 
@@ -34,5 +100,7 @@ class WebsocketWorker(QtCore.QThread):
         self._is_running = False
         if hasattr(self, 'queue_timer'):
             self.queue_timer.stop()
+        if isinstance(self.queue, TickQueue):
+            self.queue.wake()
         self.quit() 
         self.wait()
\ No newline at end of file